@@ -1,21 +1,34 @@
 import os
 import sys
+import json
 import argparse
-import re
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from datetime import datetime
 from pathlib import Path
 import tempfile
 
 import pandas as pd
+from openai import OpenAI
 
 from liturgy.get_liturgy import fetch_liturgy
-from liturgy.arxiv import get_papers 
+from liturgy.arxiv import get_papers, is_complete_pdf
 from liturgy.title import generate_episode_title
-from liturgy.summarize import make_summary
-from liturgy.build_track import build_track
+from liturgy.summarize import (summarize_pdf, summarize_batch, synthesize_speech,
+                               estimate_summary_tokens, text_key, audio_key)
+from liturgy.summary_cache import SummaryCache, file_sha256
+from liturgy.pdf_text import (HAVE_PYPDF, DEFAULT_MAX_INPUT_TOKENS, extract_text, extract_texts,
+                              extraction_pool)
+from liturgy.scheduler import SummaryScheduler
+from liturgy.build_track import build_track, RENDITIONS
+from liturgy.paper_index import PaperIndex
+from liturgy.pcm_cache import PcmCache
 
 chunk_size = 2
 
+_DONE = object()  # end-of-stream marker for the pipeline queues
+
 with open("OPENAI.txt", "r") as oai:
     key = oai.readline().strip()
 
@@ -25,24 +38,242 @@ def cline():
     parser = argparse.ArgumentParser()
     parser.add_argument("--date", help="Date in YYYY-MM-DD format, or 'today'", default="today")
     parser.add_argument("--debug", help="Compile short snippet", default=False, action="store_true")
+    parser.add_argument("--workers", help="Summaries/TTS calls in flight at once", type=int, default=4)
+    parser.add_argument("--rpm", help="Requests-per-minute budget for summaries", type=int, default=None)
+    parser.add_argument("--tpm", help="Tokens-per-minute budget for summaries", type=int, default=None)
+    parser.add_argument("--batch", help="Summarize the whole day as one Batch API job", default=False, action="store_true")
+    parser.add_argument("--local-text", help="Send locally extracted PDF text instead of the PDF (needs pypdf)",
+                        default=False, action="store_true")
+    parser.add_argument("--tts-chunk-chars", help="Synthesize speech in parallel sentence chunks of this size",
+                        type=int, default=None)
+    parser.add_argument("--renditions", help="Extra encodings next to the main mp3 (episodes/<name>/)",
+                        nargs="*", choices=[r for r in RENDITIONS if r != "main"], default=["mobile", "opus"])
+    parser.add_argument("--target-dbfs", help="Normalize every paper's clip to this loudness (dBFS RMS, e.g. -20); "
+                        "re-encodes the episode", type=float, default=None)
+    parser.add_argument("--max-input-tokens", help="Token cap of the extracted text", type=int,
+                        default=DEFAULT_MAX_INPUT_TOKENS)
     return parser.parse_args()
 
 
-def split_summary(summary):
-    text = "".join(summary)
-    sentences = re.split(r"(?<=[.!?]) +", text)
-    return sentences
+def _read_stamp(path):
+    """Stage keys ({"text": ..., "audio": ...}) the artifacts next to `path` were made with."""
+    try:
+        return json.loads(Path(path).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_stamp(path, **keys):
+    stamp = _read_stamp(path)
+    stamp.update(keys)
+    tmp = Path(f"{path}.tmp")
+    tmp.write_text(json.dumps(stamp))
+    os.replace(tmp, path)
+
 
-def get_summaries(date, topic="q-bio.BM", summaries_subdir="summaries"):
+def get_summaries(date, topic="q-bio.BM", summaries_subdir="summaries",
+                  workers=4, rpm=None, tpm=None, batch=False,
+                  local_text=False, max_input_tokens=DEFAULT_MAX_INPUT_TOKENS,
+                  tts_chunk_chars=None):
     """
-    Return a list of summary strings for all PDFs in `outdir`.
+    Return the summary audio paths for all PDFs of `date`, in PDF order.
+
+    Runs as a staged pipeline connected by queues: the scraper hands over each
+    PDF as soon as it lands, the summarize stage turns PDFs into text and the
+    TTS stage turns text into audio, so the first paper is being read out while
+    later ones are still downloading. Each stage runs up to `workers` API calls
+    at once through a SummaryScheduler (`rpm`/`tpm` budgets for the summaries,
+    adaptive backoff on 429s). PDFs already in `database/<date>` are queued
+    first.
+
+    Each stage leaves its own artifact in `<outdir>/<summaries_subdir>`:
+    `<pdfname>.txt` (summary text), `<pdfname>.mp3` (audio) and `<pdfname>.json`
+    (the stage keys they were made with). Only stages whose key changed rerun,
+    so a new voice or a failed TTS call does not redo the summary. Missing
+    stages are looked up in the global SummaryCache (same PDF bytes and settings
+    under any date) before anything is uploaded. An mp3 from before stage
+    tracking (no .json) is reused as is.
+
+    With `batch=True` the summarize stage collects the day's PDFs and sends them
+    as one Batch API job (see `summarize_batch`); the job id is kept in
+    `<summaries_dir>/batch.json` so a rerun resumes polling it. Papers the batch
+    did not answer go through the per-paper path.
+
+    With `local_text=True` (needs pypdf) each PDF's text is extracted in a
+    process pool as soon as it arrives, stripped of references and appendices,
+    capped at `max_input_tokens` and sent instead of the PDF. PDFs without
+    extractable text are uploaded as before.
 
-    If a summary file already exists in `<outdir>/<summaries_subdir>/<pdfname>.txt`,
-    read and append it. Otherwise, call `make_summary(pdf_path)`, append the result,
-    and save it to that folder for future runs.
+    With `tts_chunk_chars` each summary is read out in sentence-aligned chunks
+    of that size, synthesized concurrently and joined in order.
     """
 
     outdir = Path(f"database/{date}")
+    outdir.mkdir(parents=True, exist_ok=True)
+
+    # Choose/create summaries directory: prefer <outdir>/summaries; fall back to ./summaries if it already exists.
+    summaries_dir = outdir / summaries_subdir
+    if not summaries_dir.exists():
+        alt = Path(summaries_subdir)
+        summaries_dir = alt if alt.exists() else summaries_dir
+    summaries_dir.mkdir(parents=True, exist_ok=True)
+
+    client = OpenAI()
+    # Scheduled calls handle 429s in the schedulers, not in the SDK's own retry loop.
+    api = client.with_options(max_retries=0)
+    index = PaperIndex()
+    cache = SummaryCache()
+    pdf_queue = queue.Queue()
+    text_queue = queue.Queue()
+    audio_by_pdf = {}
+
+    summarizer = SummaryScheduler(max_workers=workers, rpm=rpm, tpm=tpm)
+    speaker = SummaryScheduler(max_workers=workers)
+    # With chunked TTS each chunk is a speaker job, so at most `workers` speech
+    # requests are in flight; the per-summary jobs that wait on them run here.
+    tts_runner = ThreadPoolExecutor(max_workers=workers) if tts_chunk_chars else None
+
+    if local_text and not HAVE_PYPDF:
+        print("pypdf is not installed; uploading PDFs instead of extracted text", file=sys.stderr)
+        local_text = False
+    extractor = extraction_pool() if local_text and not batch else None
+    token_cap = max_input_tokens if local_text else None
+
+    def save_text(p, summary_file, summary_text, extracted):
+        summary_file.with_suffix(".txt").write_text(summary_text, encoding="utf-8")
+        _write_stamp(summary_file.with_suffix(".json"),
+                     text=text_key(p, max_input_tokens=max_input_tokens if extracted else None))
+        text_queue.put((p, summary_file, summary_text))
+
+    def summarize_job(p, summary_file, pdf_text=None):
+        if isinstance(pdf_text, Future):
+            pdf_text = pdf_text.result()  # extraction was started when the PDF arrived
+        summary_text = summarize_pdf(p, client=api, cache=cache,
+                                     pdf_text=pdf_text, max_input_tokens=max_input_tokens)
+        save_text(p, summary_file, summary_text, bool(pdf_text))
+
+    def tts_job(p, summary_file, summary_text):
+        audio_by_pdf[p] = synthesize_speech(summary_text, summary_file, client=api, cache=cache,
+                                            chunk_chars=tts_chunk_chars,
+                                            scheduler=speaker if tts_runner is not None else None)
+        _write_stamp(summary_file.with_suffix(".json"), audio=audio_key(summary_text, chunk_chars=tts_chunk_chars))
+        index.set_status(p.stem.split("-", 1)[1], "summarized")
+
+    def drain(jobs, what):
+        wait([f for _, f in jobs])
+        for p, f in jobs:
+            if f.exception() is not None:
+                print(f"Failed to {what} {p.name}: {f.exception()}", file=sys.stderr)
+
+    def submit_summary(jobs, p, summary_file, pdf_text=None):
+        print(f"Generating summary for {p}...")
+        if pdf_text is None and extractor is not None:
+            pdf_text = extractor.submit(extract_text, p, max_input_tokens)
+        jobs.append((p, summarizer.submit(summarize_job, p, summary_file, pdf_text,
+                                          tokens=estimate_summary_tokens(p, token_cap))))
+
+    def queue_summary(jobs, pending, p):
+        summary_file = summaries_dir / (p.stem + ".mp3")
+        text_file = summary_file.with_suffix(".txt")
+        stamp = _read_stamp(summary_file.with_suffix(".json"))
+
+        # If we already summarized this PDF (before stages were tracked), reuse it.
+        if summary_file.exists() and not stamp:
+            print("Loading existing summary.")
+            audio_by_pdf[p] = summary_file
+            return
+
+        pdf_sha = file_sha256(p)
+        made_with = (text_key(p, pdf_sha=pdf_sha), text_key(p, pdf_sha=pdf_sha, max_input_tokens=token_cap))
+        if stamp.get("text") in made_with and text_file.exists():
+            text_queue.put((p, summary_file, text_file.read_text(encoding="utf-8")))
+            return
+
+        if batch:
+            pending.append((p, summary_file))
+        else:
+            submit_summary(jobs, p, summary_file)
+
+    def summarize_pending(jobs, pending):
+        pdf_texts = {}
+        try:
+            if local_text:
+                pdf_texts = extract_texts([p for p, _ in pending], max_input_tokens)
+            texts = summarize_batch([p for p, _ in pending], summaries_dir / "batch.json",
+                                    client=client, cache=cache,
+                                    pdf_texts=pdf_texts, max_input_tokens=max_input_tokens)
+        except Exception as e:
+            print(f"Batch summarization failed, falling back to per-paper calls: {e}",
+                  file=sys.stderr)
+            texts = {}
+        for p, summary_file in pending:
+            try:
+                if p in texts:
+                    save_text(p, summary_file, texts[p], bool(pdf_texts.get(p)))
+                else:
+                    submit_summary(jobs, p, summary_file, pdf_texts.get(p))
+            except Exception as e:
+                print(f"Failed to summarize {p.name}: {e}", file=sys.stderr)
+
+    def summarize_stage():
+        seen = set()
+        jobs = []
+        pending = []
+        # The end marker must reach the TTS stage whatever happens here, or it waits forever.
+        try:
+            while True:
+                p = pdf_queue.get()
+                if p is _DONE:
+                    break
+                p = Path(p)
+                if p in seen:
+                    continue
+                seen.add(p)
+                try:
+                    queue_summary(jobs, pending, p)
+                except Exception as e:
+                    # Skip this PDF; a fresh copy from the downloader is tried again.
+                    seen.discard(p)
+                    print(f"Failed to summarize {p.name}: {e}", file=sys.stderr)
+            if pending:
+                summarize_pending(jobs, pending)
+        finally:
+            drain(jobs, "summarize")
+            text_queue.put(_DONE)
+
+    def tts_stage():
+        jobs = []
+        try:
+            while True:
+                item = text_queue.get()
+                if item is _DONE:
+                    break
+                p, summary_file, summary_text = item
+                try:
+                    stamp = _read_stamp(summary_file.with_suffix(".json"))
+                    if stamp.get("audio") == audio_key(summary_text, chunk_chars=tts_chunk_chars) \
+                            and summary_file.exists():
+                        print("Loading existing summary.")
+                        audio_by_pdf[p] = summary_file
+                        continue
+                    if tts_runner is not None:
+                        jobs.append((p, tts_runner.submit(tts_job, *item)))
+                    else:
+                        jobs.append((p, speaker.submit(tts_job, *item)))
+                except Exception as e:
+                    print(f"Failed to synthesize {p.name}: {e}", file=sys.stderr)
+        finally:
+            drain(jobs, "synthesize")
+
+    stages = [threading.Thread(target=summarize_stage), threading.Thread(target=tts_stage)]
+    for t in stages:
+        t.start()
+
+    # PDFs from an earlier run start right away; a truncated one is left to
+    # get_papers, which downloads it again and hands it over through on_pdf.
+    for p in sorted(outdir.glob("*.pdf")):
+        if is_complete_pdf(p):
+            pdf_queue.put(p)
 
     print("Fetching papers")
     lists = ["cs.LG", "cs.AI", "q-bio.BM", "cs.CL", "q-bio.QM"]
@@ -58,47 +289,35 @@ def get_summaries(date, topic="q-bio.BM", summaries_subdir="summaries"):
                 "Molecular",
                 "atomic",
                 "atom"]
-    get_papers(date=date, 
-               cats=lists,
-               keywords=keywords,
-               out=str(outdir)
-               )
-
-    print("Summarizing ...")
-    # Choose/create summaries directory: prefer <outdir>/summaries; fall back to ./summaries if it already exists.
-    summaries_dir = outdir / summaries_subdir
-    if not summaries_dir.exists():
-        alt = Path(summaries_subdir)
-        summaries_dir = alt if alt.exists() else summaries_dir
-    summaries_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        get_papers(date=date, 
+                   cats=lists,
+                   keywords=keywords,
+                   out=str(outdir),
+                   workers=4,
+                   min_interval=0.5,
+                   on_pdf=pdf_queue.put,
+                   )
+    finally:
+        pdf_queue.put(_DONE)
+        for t in stages:
+            t.join()
+        summarizer.shutdown()
+        if tts_runner is not None:
+            tts_runner.shutdown()
+        speaker.shutdown()
+        if extractor is not None:
+            extractor.shutdown()
+        index.close()
+        print(cache.report())
+        if summarizer.throttled or speaker.throttled:
+            print(f"Rate limited: {summarizer.throttled} summary / {speaker.throttled} TTS retries")
 
-    pdf_paths = sorted(outdir.glob("*.pdf"))
-    if not pdf_paths:
+    if not audio_by_pdf:
         print(f"No PDFs found in {outdir}", file=sys.stderr)
         return []
 
-    summary_audio_paths = []
-    for p in pdf_paths:
-        summary_file = summaries_dir / (p.stem + ".mp3")
-
-        # If we already summarized this PDF, reuse it.
-        if summary_file.exists():
-            try:
-                summary_audio_paths.append(summary_file)
-                print("Loading existing summary.")
-                continue
-            except Exception as e:
-                print(f"Failed to read existing summary for {p.name}: {e} (will regenerate)", file=sys.stderr)
-
-        # Otherwise, generate and save a new summary.
-        try:
-            print(f"Generating summary for {p}...")
-            summary_path, summary_text = make_summary(str(p), summary_file)
-            summary_audio_paths.append(summary_path)
-        except Exception as e:
-            print(f"Failed to summarize {p.name}: {e}", file=sys.stderr)
-
-    return summary_audio_paths 
+    return [audio_by_pdf[p] for p in sorted(audio_by_pdf)]
 
 
 def build_episode(args):
@@ -110,41 +329,59 @@ def build_episode(args):
 
     Path("texts").mkdir(parents=True, exist_ok=True)
 
-    audio_paths = get_summaries(date=query_date)
+    audio_paths = get_summaries(date=query_date, workers=args.workers, rpm=args.rpm, tpm=args.tpm,
+                                batch=args.batch, local_text=args.local_text,
+                                max_input_tokens=args.max_input_tokens,
+                                tts_chunk_chars=args.tts_chunk_chars)
     print(audio_paths)
     if len(audio_paths) < 1:
         print("No papers for this day")
         return
-    audio_path, timestamps = build_track(audio_paths, f"episodes/{query_date}.mp3", overwrite=True)
+    try:
+        metadata = pd.read_csv(f"database/{query_date}/metadata.csv", dtype={"arxiv_id":"string"})
+    except FileNotFoundError:
+        metadata = None
 
-    with open(f"texts/{query_date}.txt", "w") as txt:
-        try:
-            metadata = pd.read_csv(f"database/{query_date}/metadata.csv", dtype={"arxiv_id":"string"})
-        except FileNotFoundError:
+    # The episode title only needs the paper titles, so it is generated while
+    # the audio is being stitched.
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        title_future = None
+        if metadata is not None:
+            title_future = pool.submit(generate_episode_title, list(metadata["title"]))
+
+        pcm_cache = PcmCache()
+        audio_path, timestamps = build_track(audio_paths, f"episodes/{query_date}.mp3", overwrite=True,
+                                             pcm_cache=pcm_cache, renditions=args.renditions,
+                                             target_dbfs=args.target_dbfs)
+        if pcm_cache.hits or pcm_cache.misses:
+            print(pcm_cache.report())
+
+        if metadata is None:
             print(f"No episode found for {query_date}")
             return
-        text = ["This podcast is brought to you by the Oliver Laboratory"\
-                " at Vanderbilt University.\n",\
-                "-"*40 + "\n"]
-        for audio_path, time in zip(audio_paths, timestamps):
-            audio_id = str(Path(audio_path).stem.split("-")[1])
-            print(audio_id)
-            paper_data = metadata.loc[metadata['arxiv_id'] ==
-                                      str(audio_id)].reset_index()
-            print(paper_data)
-            text.append(f"{time} {paper_data['title'].iloc[0]}"\
-                        f" ({paper_data['pdf_url'].iloc[0]})")
-        text.append("-"*40 + "\n")
-        text.append("Source code: "\
-                    "https://github.com/OliverLaboratory/arxivreader \n")
-        text.append("Contact: "\
-                    "oliverlaboratory.com")
-        txt.write("\n".join(text))
-
-    with open(f"titles/{query_date}.txt", "w") as txt:
-        titles = list(metadata["title"])
-        title = generate_episode_title(titles)
-        txt.write(f"{title}")
+
+        with open(f"texts/{query_date}.txt", "w") as txt:
+            text = ["This podcast is brought to you by the Oliver Laboratory"\
+                    " at Vanderbilt University.\n",\
+                    "-"*40 + "\n"]
+            for audio_path, time in zip(audio_paths, timestamps):
+                audio_id = str(Path(audio_path).stem.split("-")[1])
+                print(audio_id)
+                paper_data = metadata.loc[metadata['arxiv_id'] ==
+                                          str(audio_id)].reset_index()
+                print(paper_data)
+                text.append(f"{time} {paper_data['title'].iloc[0]}"\
+                            f" ({paper_data['pdf_url'].iloc[0]})")
+            text.append("-"*40 + "\n")
+            text.append("Source code: "\
+                        "https://github.com/OliverLaboratory/arxivreader \n")
+            text.append("Contact: "\
+                        "oliverlaboratory.com")
+            txt.write("\n".join(text))
+
+        with open(f"titles/{query_date}.txt", "w") as txt:
+            title = title_future.result()
+            txt.write(f"{title}")
 
 
 if __name__ == "__main__":
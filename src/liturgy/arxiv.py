@@ -5,7 +5,11 @@ arxiv_titles.py
 Scan one or more arXiv category lists for a specific date and download ONLY
 the papers whose TITLES match a list of keywords. Writes JSONL/CSV metadata.
 Skips PDFs that already exist in the output folder and avoids duplicates
-across categories during the same run.
+across categories during the same run. Listing fetches and per-paper
+downloads can run on a bounded worker pool (`workers`) while a per-host
+limiter (`min_interval`) keeps the request rate polite; transient failures
+(connection errors, 429/5xx, PDF bodies that break off) are retried with
+backoff by liturgy.transport.
 
 Keyword matching uses whole-word/phrase boundaries:
   - 'rna' matches "RNA sequencing", but NOT "alteRNAtive"
@@ -26,21 +30,35 @@ Example (from another script):
 """
 
 import csv
+import gzip
+import importlib.util
 import json
 import os
 import re
 import sys
+import threading
 import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date as _date
 from zoneinfo import ZoneInfo
-from typing import Optional, List, Dict, Set, Tuple, Any, Iterable, Pattern
+from typing import Optional, List, Dict, Set, Tuple, Any, Iterable, Callable
+from urllib.parse import urlencode
 
 import requests
-from bs4 import BeautifulSoup, Tag
+from bs4 import BeautifulSoup, SoupStrainer, Tag
+
+from liturgy.http_cache import HttpCache, DEFAULT_CACHE_DIR
+from liturgy.transport import Transport
+from liturgy.paper_index import PaperIndex, DEFAULT_INDEX_PATH
 
 BASE = "https://arxiv.org"
-LIST_URL_TPL = "https://arxiv.org/list/{cat}/recent?show=2000"
-UA_DEFAULT = "arXiv titles downloader (requests; contact: youremail@example.com)"
+LIST_URL_TPL = "{base}/list/{cat}/recent?show=2000"
+EXPORT_API = "https://export.arxiv.org/api/query"
+EXPORT_BATCH = 100  # ids per export API request
+ATOM_NS = {"atom": "http://www.w3.org/2005/Atom"}
+PDF_MAGIC = b"%PDF-"
+PDF_RESUME_ATTEMPTS = 5  # transfers of one PDF per call, each resuming the .part file
 
 # "New submissions for Fri, 24 Oct 2025" style dates
 DATE_RE = re.compile(
@@ -52,6 +70,13 @@ MONTHS = {
     "Jul":7,"Aug":8,"Sep":9,"Oct":10,"Nov":11,"Dec":12
 }
 
+# Day headers on listing pages; matched on the raw HTML so we can cut out one
+# day's section before building any tree.
+H3_RE = re.compile(r"<h3\b[^>]*>(.*?)</h3\s*>", re.IGNORECASE | re.DOTALL)
+
+# Prefer lxml when it is installed; it is several times faster than html.parser.
+HTML_PARSER = "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+
 ABS_ID_RE = re.compile(r"/abs/([^/?#]+)")
 ARXIV_ID_RE = re.compile(r"(\d{4}\.\d{4,5})(v\d+)?")  # e.g., 2510.12345v2
 
@@ -74,20 +99,54 @@ def _normalize_list(arg: Iterable[str] | str) -> List[str]:
 def _keywords_list(arg: Iterable[str] | str) -> List[str]:
     return [k.strip() for k in _normalize_list(arg)]
 
-def _compile_keyword_patterns(keywords: List[str]) -> List[Pattern]:
+class _KeywordMatcher:
     """
-    Compile case-insensitive regex patterns that only match a keyword as a whole word/phrase.
-    Uses custom "token" boundaries so 'rna' won't match inside 'alteRNAtive'.
+    Single-pass, whole-word/phrase keyword matcher built once per run.
 
-    We anchor with (?<![A-Za-z0-9]) ... (?![A-Za-z0-9]) around the escaped keyword.
+    A title is lower-cased once, a small regex finds token starts that could
+    begin a keyword, and at each start one dict probe per distinct keyword
+    length decides which keywords hit. Cost per title depends on the number of
+    tokens and distinct lengths, not on how many keywords there are.
+
+    Boundaries are the same "token" boundaries as before: a keyword must not be
+    preceded or followed by [A-Za-z0-9], so 'rna' won't match inside
+    'alteRNAtive'. Matching is case-insensitive.
     """
-    pats: List[Pattern] = []
-    for kw in keywords:
-        if not kw:
-            continue
-        escaped = re.escape(kw)
-        pats.append(re.compile(rf"(?<![A-Za-z0-9]){escaped}(?![A-Za-z0-9])", re.IGNORECASE))
-    return pats
+
+    def __init__(self, keywords: List[str], mode: str = "any"):
+        self.mode = mode
+        self._by_key: Dict[str, str] = {}
+        for kw in keywords:
+            if kw:
+                self._by_key.setdefault(kw.lower(), kw)
+        self._lengths = sorted({len(k) for k in self._by_key})
+        firsts = "".join(sorted({re.escape(k[0]) for k in self._by_key}))
+        self._starts = re.compile(rf"(?<![a-z0-9])(?=[{firsts}])") if firsts else None
+
+    def hits(self, title: str) -> List[str]:
+        """Return the keywords (original spelling, first-seen order) found in `title`."""
+        if self._starts is None:
+            return []
+        low = title.lower()
+        n = len(low)
+        found: Dict[str, None] = {}
+        for m in self._starts.finditer(low):
+            p = m.start()
+            for length in self._lengths:
+                end = p + length
+                if end > n:
+                    break
+                kw = self._by_key.get(low[p:end])
+                if kw is not None and (end == n or not ("a" <= low[end] <= "z" or "0" <= low[end] <= "9")):
+                    found[kw] = None
+        return list(found)
+
+    def accepts(self, hits: List[str]) -> bool:
+        if not self._by_key:
+            return True
+        if self.mode == "all":
+            return len(hits) == len(self._by_key)
+        return bool(hits)
 
 def _target_date(d: _date | str) -> _date:
     if isinstance(d, _date):
@@ -100,22 +159,76 @@ def _target_date(d: _date | str) -> _date:
     return dt.date()
 
 
+# ------------------------- HTTP -------------------------
+
+def _get_text(transport: Transport, url: str, cache: Optional[HttpCache] = None) -> str:
+    """GET a text page, going through the on-disk cache when one is given."""
+    if cache is None:
+        r = transport.get(url)
+        r.raise_for_status()
+        return r.text
+    return cache.fetch(url, lambda headers: transport.get(url, headers=headers))
+
+
 # ------------------------- scraping utilities -------------------------
 
+def _header_date(text: str) -> Optional[_date]:
+    """Parse a date like 'Fri, 24 Oct 2025' out of a section header."""
+    m = DATE_RE.search(text)
+    if not m:
+        return None
+    _, day_str, mon_abbr, year_str = m.groups()
+    return datetime(int(year_str), MONTHS[mon_abbr], int(day_str)).date()
+
 def _find_section_for_date(soup: BeautifulSoup, target_d: _date) -> Optional[Tag]:
     """Find the <h3> whose text contains a date like 'Fri, 24 Oct 2025'."""
     for h3 in soup.find_all("h3"):
-        txt = h3.get_text(" ", strip=True)
-        m = DATE_RE.search(txt)
-        if not m:
-            continue
-        _, day_str, mon_abbr, year_str = m.groups()
-        d = int(day_str); y = int(year_str); mnum = MONTHS[mon_abbr]
-        header_date = datetime(y, mnum, d).date()
-        if header_date == target_d:
+        if _header_date(h3.get_text(" ", strip=True)) == target_d:
             return h3
     return None
 
+def _slice_section_for_date(html: str, target_d: _date) -> Tuple[Optional[str], List[_date]]:
+    """
+    Cut the raw HTML of the `target_d` section out of a listing page: everything
+    after its <h3> up to the next <h3>. Scanning stops at that next header.
+
+    Returns (fragment, header_dates_seen); fragment is None when the date is missing.
+    """
+    seen: List[_date] = []
+    for m in H3_RE.finditer(html):
+        header_date = _header_date(re.sub(r"<[^>]+>", " ", m.group(1)))
+        if header_date is None:
+            continue
+        seen.append(header_date)
+        if header_date == target_d:
+            nxt = H3_RE.search(html, m.end())
+            return html[m.end():nxt.start() if nxt else len(html)], seen
+    return None, seen
+
+def _split_sections(html: str) -> List[Tuple[_date, str]]:
+    """Cut a listing page into (date, fragment) pairs, one per dated <h3> section."""
+    heads = []
+    for m in H3_RE.finditer(html):
+        heads.append((m, _header_date(re.sub(r"<[^>]+>", " ", m.group(1)))))
+    sections = []
+    for i, (m, header_date) in enumerate(heads):
+        if header_date is None:
+            continue
+        end = heads[i + 1][0].start() if i + 1 < len(heads) else len(html)
+        sections.append((header_date, html[m.end():end]))
+    return sections
+
+def _iter_section_entries(fragment: str):
+    """Yield (dt, dd) pairs from a section fragment, parsing only <dt>/<dd> subtrees."""
+    soup = BeautifulSoup(fragment, HTML_PARSER, parse_only=SoupStrainer(["dt", "dd"]))
+    dt_pending: Optional[Tag] = None
+    for el in soup.find_all(["dt", "dd"], recursive=False):
+        if el.name == "dt":
+            dt_pending = el
+        elif dt_pending is not None:
+            yield dt_pending, el
+            dt_pending = None
+
 def _iter_entries_between(h3: Tag):
     """Yield (dt, dd) pairs for entries AFTER `h3` up to the NEXT <h3>."""
     next_h3 = h3.find_next("h3")
@@ -170,31 +283,74 @@ def _sanitize_filename(url: str) -> str:
         name = f"arXiv-{name}"
     return name
 
-def _download_pdf(url: str, out_dir: str, session: requests.Session) -> Optional[str]:
+def is_complete_pdf(path: str) -> bool:
+    """Cheap completeness check: PDF magic at the start and an %%EOF marker near the end."""
+    try:
+        size = os.path.getsize(path)
+        if size < len(PDF_MAGIC):
+            return False
+        with open(path, "rb") as f:
+            if f.read(len(PDF_MAGIC)) != PDF_MAGIC:
+                return False
+            f.seek(max(0, size - 2048))
+            return b"%%EOF" in f.read()
+    except OSError:
+        return False
+
+def _download_pdf(
+    url: str,
+    out_dir: str,
+    transport: Transport,
+) -> Optional[str]:
+    """
+    Download `url` into `out_dir`. Bytes go to `<name>.pdf.part` first; a
+    transfer that breaks off (reset, read timeout, short body) resumes from
+    there with a Range request, up to PDF_RESUME_ATTEMPTS times with backoff
+    within this call (Transport.download), and from the same file on a
+    later call. The file is only renamed into place once its size matches
+    the server's and it looks like a complete PDF.
+    """
     os.makedirs(out_dir, exist_ok=True)
     fn = _sanitize_filename(url)
     path = os.path.join(out_dir, fn)
     if os.path.exists(path):
-        print(f"⏭ Skip (exists): {fn}")
-        return path
-    with session.get(url, stream=True, timeout=60) as r:
-        r.raise_for_status()
-        total = int(r.headers.get("Content-Length") or 0)
+        if is_complete_pdf(path):
+            print(f"⏭ Skip (exists): {fn}")
+            return path
+        print(f"⚠ Incomplete PDF on disk, downloading again: {fn}", file=sys.stderr)
+        os.remove(path)
+
+    def announce(r, offset, total):
         size_msg = f" ({total/1024/1024:.2f} MB)" if total else ""
-        print(f"↓ Downloading: {fn}{size_msg}")
-        with open(path, "wb") as f:
-            for chunk in r.iter_content(chunk_size=131072):
-                if chunk:
-                    f.write(chunk)
+        resume_msg = f", resuming at {offset/1024/1024:.2f} MB" if offset else ""
+        print(f"↓ Downloading: {fn}{size_msg}{resume_msg}")
+
+    part = path + ".part"
+    leftover = os.path.exists(part)
+    transport.download(url, part, resume_attempts=PDF_RESUME_ATTEMPTS, on_response=announce)
+    if leftover and not is_complete_pdf(part):
+        # The .part left by an earlier run was garbage (e.g. a 416 past its
+        # end on a changed file): start over once.
+        os.remove(part)
+        transport.download(url, part, resume_attempts=PDF_RESUME_ATTEMPTS, on_response=announce)
+
+    if not is_complete_pdf(part):
+        if os.path.exists(part):
+            os.remove(part)
+        raise ValueError(f"{fn} is not a valid PDF (missing %PDF- header or %%EOF trailer)")
+    os.replace(part, path)
     print(f"✓ Saved: {fn}")
     return path
 
-def _fetch_abs_metadata(abs_id: str, session: requests.Session) -> Dict[str, Any]:
+def _fetch_abs_metadata(
+    abs_id: str,
+    transport: Transport,
+    cache: Optional[HttpCache] = None,
+) -> Dict[str, Any]:
     """Fetch title, authors, abstract, and submitted date from /abs/<id>."""
     abs_url = f"{BASE}/abs/{abs_id}"
-    r = session.get(abs_url, timeout=60)
-    r.raise_for_status()
-    s = BeautifulSoup(r.text, "html.parser")
+    text = _get_text(transport, abs_url, cache)
+    s = BeautifulSoup(text, HTML_PARSER)
 
     # Title
     title = None
@@ -239,79 +395,239 @@ def _fetch_abs_metadata(abs_id: str, session: requests.Session) -> Dict[str, Any
         "pdf_url": _extract_pdf_url_from_id(abs_id),
     }
 
-def _write_metadata(out_dir: str, rows: List[Dict[str, Any]]) -> None:
-    os.makedirs(out_dir, exist_ok=True)
-    jsonl_path = os.path.join(out_dir, "metadata.jsonl")
-    csv_path = os.path.join(out_dir, "metadata.csv")
+def _parse_export_feed(xml_text: str) -> Dict[str, Dict[str, Any]]:
+    """Parse an export API Atom feed into {base_id: partial metadata}."""
+    out: Dict[str, Dict[str, Any]] = {}
+    root = ET.fromstring(xml_text)
+    for entry in root.findall("atom:entry", ATOM_NS):
+        mid = ARXIV_ID_RE.search(entry.findtext("atom:id", "", ATOM_NS))
+        if not mid:
+            continue  # error entries carry an api/errors id
+        title = " ".join(entry.findtext("atom:title", "", ATOM_NS).split())
+        abstract = " ".join(entry.findtext("atom:summary", "", ATOM_NS).split())
+        authors = [
+            " ".join(a.findtext("atom:name", "", ATOM_NS).split())
+            for a in entry.findall("atom:author", ATOM_NS)
+        ]
+        submitted = None
+        published = entry.findtext("atom:published", "", ATOM_NS)
+        if published:
+            try:
+                pub = datetime.strptime(published[:10], "%Y-%m-%d")
+                submitted = f"[Submitted on {pub.day} {pub:%b %Y}]"
+            except ValueError:
+                submitted = published
+        out[mid.group(1)] = {
+            "version": mid.group(2),
+            "title": title or None,
+            "authors": [a for a in authors if a],
+            "abstract": abstract or None,
+            "submitted": submitted,
+        }
+    return out
 
-    with open(jsonl_path, "w", encoding="utf-8") as jf:
-        for r in rows:
-            jf.write(json.dumps(r, ensure_ascii=False) + "\n")
+def _fetch_batch_metadata(
+    abs_ids: List[str],
+    transport: Transport,
+    cache: Optional[HttpCache] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Resolve many ids through the export API (`id_list` queries of up to
+    EXPORT_BATCH ids) instead of one /abs page each. Returns {abs_id: metadata}
+    for the ids that came back; callers scrape /abs/<id> for the rest.
+    """
+    found: Dict[str, Dict[str, Any]] = {}
+    for i in range(0, len(abs_ids), EXPORT_BATCH):
+        chunk = abs_ids[i:i + EXPORT_BATCH]
+        url = f"{EXPORT_API}?" + urlencode({"id_list": ",".join(chunk), "max_results": len(chunk)})
+        try:
+            by_base = _parse_export_feed(_get_text(transport, url, cache))
+        except Exception as e:
+            print(f"✗ Batch metadata request failed ({len(chunk)} ids): {e}", file=sys.stderr)
+            continue
+        for abs_id in chunk:
+            mver = ARXIV_ID_RE.match(abs_id)
+            base_id = mver.group(1) if mver else abs_id
+            part = by_base.get(base_id)
+            if part is None or not part["title"]:
+                continue
+            found[abs_id] = {
+                "arxiv_id": base_id,
+                "version": (mver.group(2) if mver else None) or part["version"],
+                "title": part["title"],
+                "authors": part["authors"],
+                "abstract": part["abstract"],
+                "submitted": part["submitted"],
+                "abs_url": f"{BASE}/abs/{abs_id}",
+                "pdf_url": _extract_pdf_url_from_id(abs_id),
+            }
+    print(f"✓ Batch metadata: {len(found)}/{len(abs_ids)} ids resolved via export API")
+    return found
+
+# Fields describing the paper itself (what /abs or the export API give us) ...
+PAPER_META_FIELDS = [
+    "arxiv_id", "version", "title", "authors", "abstract",
+    "submitted", "abs_url", "pdf_url",
+]
+# ... plus what this pipeline adds per row.
+METADATA_FIELDS = PAPER_META_FIELDS + [
+    "pdf_path", "source_category", "subjects", "matched_keywords",
+]
+
+def _merge_rows(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Newer values win, but empty ones (failed metadata fetch) never wipe stored data."""
+    merged = dict(old)
+    merged.update({k: v for k, v in new.items() if v not in (None, "", [])})
+    return merged
+
+class _MetadataStore:
+    """
+    Incremental `metadata.jsonl` / `metadata.csv` for one output folder.
 
-    fieldnames = [
-        "arxiv_id", "version", "title", "authors", "abstract",
-        "submitted", "abs_url", "pdf_url", "pdf_path", "source_category", "subjects"
-    ]
-    with open(csv_path, "w", newline="", encoding="utf-8") as cf:
-        w = csv.DictWriter(cf, fieldnames=fieldnames)
-        w.writeheader()
-        for r in rows:
-            r_flat = r.copy()
-            r_flat["authors"] = "; ".join(r.get("authors") or [])
-            w.writerow(r_flat)
+    Each finished paper is appended to the JSONL file and fsync'ed right away,
+    so a crash mid-run keeps every completed row. `finalize()` compacts the
+    file (one row per arxiv_id, merged with what earlier runs wrote) and
+    regenerates the CSV; both are replaced atomically.
+    """
 
-    print(f"✓ Wrote metadata:\n  - {jsonl_path}\n  - {csv_path}")
+    def __init__(self, out_dir: str):
+        os.makedirs(out_dir, exist_ok=True)
+        self.jsonl_path = os.path.join(out_dir, "metadata.jsonl")
+        self.csv_path = os.path.join(out_dir, "metadata.csv")
+        self._lock = threading.Lock()
+        self._stored: Dict[str, Dict[str, Any]] = {
+            r["arxiv_id"]: r for r in self._read_rows() if r.get("arxiv_id")
+        }
+        self.appended = 0
+
+    def _read_rows(self):
+        if not os.path.exists(self.jsonl_path):
+            return
+        with open(self.jsonl_path, "r", encoding="utf-8") as jf:
+            for line in jf:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn last line from an interrupted run
+
+    def get(self, arxiv_id: str) -> Optional[Dict[str, Any]]:
+        """Row written by an earlier run, if any."""
+        return self._stored.get(arxiv_id)
+
+    def append(self, row: Dict[str, Any]) -> None:
+        line = json.dumps(row, ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self.jsonl_path, "a", encoding="utf-8") as jf:
+                jf.write(line)
+                jf.flush()
+                os.fsync(jf.fileno())
+            self.appended += 1
+
+    def needs_finalize(self) -> bool:
+        """
+        True if rows from an earlier run never made it into the CSV (e.g. it
+        crashed between appending and `finalize()`): the CSV is missing or
+        older than the JSONL.
+        """
+        if not self._stored:
+            return False
+        if not os.path.exists(self.csv_path):
+            return True
+        return os.path.getmtime(self.csv_path) < os.path.getmtime(self.jsonl_path)
+
+    def finalize(self) -> None:
+        with self._lock:
+            merged: Dict[str, Dict[str, Any]] = {}
+            for r in self._read_rows():
+                key = r.get("arxiv_id")
+                if key:
+                    merged[key] = _merge_rows(merged[key], r) if key in merged else r
+            if not merged:
+                return
+
+            tmp = self.jsonl_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as jf:
+                for r in merged.values():
+                    jf.write(json.dumps(r, ensure_ascii=False) + "\n")
+                jf.flush()
+                os.fsync(jf.fileno())
+            os.replace(tmp, self.jsonl_path)
+
+            tmp = self.csv_path + ".tmp"
+            with open(tmp, "w", newline="", encoding="utf-8") as cf:
+                w = csv.DictWriter(cf, fieldnames=METADATA_FIELDS, extrasaction="ignore")
+                w.writeheader()
+                for r in merged.values():
+                    r_flat = r.copy()
+                    r_flat["authors"] = "; ".join(r.get("authors") or [])
+                    r_flat["matched_keywords"] = "; ".join(r.get("matched_keywords") or [])
+                    w.writerow(r_flat)
+                cf.flush()
+                os.fsync(cf.fileno())
+            os.replace(tmp, self.csv_path)
+
+        print(f"✓ Wrote metadata ({len(merged)} rows, {self.appended} new):\n  - {self.jsonl_path}\n  - {self.csv_path}")
 
 
 # ------------------------- per-category processing -------------------------
 
-def _process_category(
-    session: requests.Session,
+def _scan_category(
+    transport: Transport,
     category: str,
     tdate: _date,
-    out_dir: str,
-    kw_patterns: List[Pattern],
-    keyword_mode: str,
-    seen_ids: Set[str],
-    sleep: float = 0.0,
-) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
-    list_url = LIST_URL_TPL.format(cat=category)
+    matcher: _KeywordMatcher,
+    cache: Optional[HttpCache] = None,
+) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Fetch one category listing and return (candidates, scanned), where each
+    candidate is a title-matched entry of the target date section.
+    """
     label = category
-    print(f"[{label}] Fetching listing: {list_url}")
-    html = session.get(list_url, timeout=60)
-    html.raise_for_status()
-    soup = BeautifulSoup(html.text, "html.parser")
-
-    h3 = _find_section_for_date(soup, tdate)
-    if not h3:
-        available = []
-        for tag in soup.find_all("h3"):
-            m = DATE_RE.search(tag.get_text(" ", strip=True))
-            if m:
-                _, d, mon, y = m.groups()
-                available.append(f"{int(d):02d} {mon} {y}")
+    html = _fetch_listing(transport, category, cache)
+
+    fragment, available = _slice_section_for_date(html, tdate)
+    if fragment is not None:
+        entries = _iter_section_entries(fragment)
+    elif not available:
+        # No recognisable headers in the raw HTML (markup changed?): fall back
+        # to a full-tree parse of the page.
+        soup = BeautifulSoup(html, HTML_PARSER)
+        h3 = _find_section_for_date(soup, tdate)
+        available = [d for d in (_header_date(t.get_text(" ", strip=True)) for t in soup.find_all("h3")) if d]
+        entries = _iter_entries_between(h3) if h3 else None
+    else:
+        entries = None
+
+    if entries is None:
         print(f"[{label}] No section found for: {tdate} (America/New_York).")
         if available:
-            print(f"[{label}] Available dates on page: " + ", ".join(available))
-        return [], {"scanned": 0, "matched": 0, "skipped_existing": 0, "skipped_duplicate": 0}
+            print(f"[{label}] Available dates on page: " + ", ".join(d.strftime("%d %b %Y") for d in available))
+        return [], 0
+    return _match_entries(entries, matcher)
 
-    def _title_matches_patterns(title: str) -> bool:
-        if not kw_patterns:
-            return True
-        if keyword_mode == "all":
-            return all(p.search(title) for p in kw_patterns)
-        return any(p.search(title) for p in kw_patterns)
-
-    rows: List[Dict[str, Any]] = []
+def _fetch_listing(
+    transport: Transport,
+    category: str,
+    cache: Optional[HttpCache] = None,
+) -> str:
+    list_url = LIST_URL_TPL.format(base=BASE, cat=category)
+    print(f"[{category}] Fetching listing: {list_url}")
+    return _get_text(transport, list_url, cache)
+
+def _match_entries(entries, matcher: _KeywordMatcher) -> Tuple[List[Dict[str, Any]], int]:
+    """Filter (dt, dd) pairs by title; returns (candidates, scanned)."""
+    candidates: List[Dict[str, Any]] = []
     scanned = 0
-    matched = 0
-    skipped_existing = 0
-    skipped_duplicate = 0
-
-    for dt_tag, dd_tag in _iter_entries_between(h3):
+    for dt_tag, dd_tag in entries:
         scanned += 1
         title = _extract_title_from_dd(dd_tag)
-        if not title or not _title_matches_patterns(title):
+        if not title:
+            continue
+        hits = matcher.hits(title)
+        if not matcher.accepts(hits):
             continue
 
         abs_id = _extract_abs_id_from_dt(dt_tag)
@@ -319,61 +635,204 @@ def _process_category(
             continue
 
         base_id = ARXIV_ID_RE.match(abs_id).group(1) if ARXIV_ID_RE.match(abs_id) else abs_id
-        if base_id in seen_ids:
-            print(f"[{label}] ⏭ Skip (duplicate id in this run): {base_id}")
-            skipped_duplicate += 1
-            continue
-        seen_ids.add(base_id)
-
-        pdf_url = _extract_pdf_url_from_id(abs_id)
-        pdf_fn = _sanitize_filename(pdf_url)
-        pdf_path_expected = os.path.join(out_dir, pdf_fn)
-        if os.path.exists(pdf_path_expected):
-            print(f"[{label}] ⏭ Skip (exists): {pdf_fn}")
-            skipped_existing += 1
-            continue
+        candidates.append({
+            "abs_id": abs_id,
+            "base_id": base_id,
+            "title": title,
+            "subjects": _extract_subjects_text(dd_tag),
+            "matched_keywords": hits,
+        })
+    return candidates, scanned
 
-        # Fetch metadata and download
-        try:
-            meta = _fetch_abs_metadata(abs_id, session)
-        except Exception as e:
-            print(f"[{label}] ✗ Metadata fetch failed for {abs_id}: {e}", file=sys.stderr)
-            meta = {
-                "arxiv_id": base_id,
-                "version": None,
-                "title": title,
-                "authors": [],
-                "abstract": None,
-                "submitted": None,
-                "abs_url": f"{BASE}/abs/{abs_id}",
-                "pdf_url": pdf_url,
-            }
+def _process_paper(
+    transport: Transport,
+    category: str,
+    cand: Dict[str, Any],
+    out_dir: str,
+    sleep: float = 0.0,
+    cache: Optional[HttpCache] = None,
+    meta: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Download the PDF for one matched entry and return its metadata row.
+    `meta` comes from the batch lookup; without it we scrape /abs/<id>.
+    """
+    label = category
+    abs_id = cand["abs_id"]
+    pdf_url = _extract_pdf_url_from_id(abs_id)
 
-        try:
-            pdf_path = _download_pdf(meta["pdf_url"], out_dir, session)
-        except Exception as e:
-            print(f"[{label}] ✗ PDF download failed for {abs_id}: {e}", file=sys.stderr)
-            pdf_path = None
-
-        subjects_line = _extract_subjects_text(dd_tag)
-        rows.append({
-            **meta,
-            "pdf_path": pdf_path,
-            "source_category": category,
-            "subjects": subjects_line,
-        })
-        matched += 1
+    try:
+        if meta is None:
+            meta = _fetch_abs_metadata(abs_id, transport, cache)
+    except Exception as e:
+        print(f"[{label}] ✗ Metadata fetch failed for {abs_id}: {e}", file=sys.stderr)
+        meta = {
+            "arxiv_id": cand["base_id"],
+            "version": None,
+            "title": cand["title"],
+            "authors": [],
+            "abstract": None,
+            "submitted": None,
+            "abs_url": f"{BASE}/abs/{abs_id}",
+            "pdf_url": pdf_url,
+        }
+
+    try:
+        pdf_path = _download_pdf(meta["pdf_url"], out_dir, transport)
+    except Exception as e:
+        print(f"[{label}] ✗ PDF download failed for {abs_id}: {e}", file=sys.stderr)
+        pdf_path = None
 
-        if sleep > 0:
-            time.sleep(sleep)
+    if sleep > 0:
+        time.sleep(sleep)
 
-    stats = {
-        "scanned": scanned,
-        "matched": matched,
-        "skipped_existing": skipped_existing,
-        "skipped_duplicate": skipped_duplicate,
+    return {
+        **meta,
+        "pdf_path": pdf_path,
+        "source_category": category,
+        "subjects": cand["subjects"],
+        "matched_keywords": cand["matched_keywords"],
     }
-    return rows, stats
+
+
+def _run_day(
+    transport: Transport,
+    pool: ThreadPoolExecutor,
+    tdate: _date,
+    out_dir: str,
+    scans: Iterable[Tuple[str, Tuple[List[Dict[str, Any]], int]]],
+    sleep: float = 0.0,
+    cache: Optional[HttpCache] = None,
+    index: Optional[PaperIndex] = None,
+    on_pdf: Optional[Callable[[str], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Dedup, fetch metadata for and download the matched entries of one day.
+    `scans` yields (category, (candidates, scanned)) in category order.
+    `on_pdf(path)` is called from the worker as soon as each PDF lands.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    store = _MetadataStore(out_dir)
+    day = tdate.isoformat()
+    all_rows: List[Dict[str, Any]] = []
+    seen_ids: Set[str] = set()
+    per_cat_stats: Dict[str, Dict[str, int]] = {}
+
+    # Dedup runs serially in category order so `seen_ids` and the stats
+    # come out exactly as in a sequential run; only the paper work fans out.
+    pending: List[Tuple[str, Dict[str, Any]]] = []
+    for cat, (candidates, scanned) in scans:
+        stats = {
+            "scanned": scanned, "matched": 0, "skipped_existing": 0,
+            "skipped_duplicate": 0, "skipped_indexed": 0,
+        }
+        per_cat_stats[cat] = stats
+        for cand in candidates:
+            base_id = cand["base_id"]
+            if base_id in seen_ids:
+                print(f"[{cat}] ⏭ Skip (duplicate id in this run): {base_id}")
+                stats["skipped_duplicate"] += 1
+                continue
+            seen_ids.add(base_id)
+
+            prior = index.get(base_id) if index else None
+            if prior and prior["date"] != day and prior["status"] != "failed":
+                print(f"[{cat}] ⏭ Skip (already covered on {prior['date']}): {base_id}")
+                stats["skipped_indexed"] += 1
+                continue
+
+            pdf_fn = _sanitize_filename(_extract_pdf_url_from_id(cand["abs_id"]))
+            pdf_path = os.path.join(out_dir, pdf_fn)
+            # A PDF without a metadata row (older partial run) still goes
+            # through the pipeline; the download itself is skipped.
+            if is_complete_pdf(pdf_path) and store.get(base_id):
+                print(f"[{cat}] ⏭ Skip (exists): {pdf_fn}")
+                stats["skipped_existing"] += 1
+                if index and prior is None:
+                    index.record(cand["abs_id"], day, "downloaded", category=cat, pdf_path=pdf_path)
+                continue
+
+            pending.append((cat, cand))
+
+    # Rows stored by an earlier run are reused instead of asking arXiv again.
+    metas: Dict[str, Dict[str, Any]] = {}
+    for _, cand in pending:
+        prev = store.get(cand["base_id"])
+        if prev and prev.get("title"):
+            metas[cand["abs_id"]] = {k: prev.get(k) for k in PAPER_META_FIELDS}
+    to_fetch = [c["abs_id"] for _, c in pending if c["abs_id"] not in metas]
+    if to_fetch:
+        metas.update(_fetch_batch_metadata(to_fetch, transport, cache))
+
+    jobs = [
+        (cat, pool.submit(
+            _process_paper, transport, cat, cand, out_dir, sleep, cache, metas.get(cand["abs_id"]),
+        ))
+        for cat, cand in pending
+    ]
+    if on_pdf is not None:
+        def _notify(fut):
+            if not fut.exception() and fut.result()["pdf_path"]:
+                on_pdf(fut.result()["pdf_path"])
+        for _, fut in jobs:
+            fut.add_done_callback(_notify)
+    for cat, fut in jobs:
+        row = fut.result()
+        store.append(row)
+        all_rows.append(row)
+        per_cat_stats[cat]["matched"] += 1
+        if index:
+            index.record(
+                row["arxiv_id"], day, "downloaded" if row["pdf_path"] else "failed",
+                version=row["version"], category=cat, pdf_path=row["pdf_path"],
+            )
+
+    for cat, stats in per_cat_stats.items():
+        print(
+            f"[{cat}] New: {stats['matched']} (matched {stats['matched']} / scanned {stats['scanned']}; "
+            f"skipped {stats['skipped_existing']} existing, {stats['skipped_duplicate']} duplicates, "
+            f"{stats['skipped_indexed']} covered on earlier days)"
+        )
+
+    if not all_rows:
+        print(f"No new entries downloaded for {day}.")
+    if all_rows or store.needs_finalize():
+        store.finalize()
+    return {"out_dir": out_dir, "rows": all_rows, "per_category": per_cat_stats}
+
+def _close_transport(transport: Transport) -> Dict[str, Any]:
+    t_stats = transport.stats()
+    transport.close()
+    print(
+        f"HTTP: {t_stats['requests']} requests, {t_stats['retried']} retried, {t_stats['failed']} failed, "
+        f"{t_stats['total_seconds']:.1f}s total (slowest {t_stats['max_seconds']:.1f}s)"
+    )
+    return t_stats
+
+def _close_cache(cache: Optional[HttpCache]) -> Optional[Dict[str, int]]:
+    if cache is None:
+        return None
+    cache_stats = cache.stats()
+    cache.close()
+    print(
+        f"HTTP cache: {cache_stats['hits']} fresh hits, {cache_stats['revalidated']} revalidated, "
+        f"{cache_stats['misses']} misses ({cache_stats['entries']} entries, "
+        f"{cache_stats['bytes']/1024/1024:.1f} MB)"
+    )
+    return cache_stats
+
+def _check_args(keyword_mode: str, workers: int, cats, keywords) -> Tuple[List[str], List[str]]:
+    if keyword_mode not in ("any", "all"):
+        raise ValueError("keyword_mode must be 'any' or 'all'")
+    if workers < 1:
+        raise ValueError("workers must be >= 1")
+    cats_list = _normalize_list(cats)
+    kw_list = _keywords_list(keywords)
+    if not cats_list:
+        raise ValueError("--cats produced an empty list")
+    if not kw_list:
+        raise ValueError("--keywords produced an empty list")
+    return cats_list, kw_list
 
 
 # ------------------------- public API -------------------------
@@ -386,6 +845,11 @@ def get_papers(
     keyword_mode: str = "any",
     sleep: float = 0.0,
     user_agent: Optional[str] = None,
+    workers: int = 1,
+    min_interval: float = 0.0,
+    cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+    index_path: Optional[str] = DEFAULT_INDEX_PATH,
+    on_pdf: Optional[Callable[[str], None]] = None,
 ) -> Dict[str, Any]:
     """
     Run the downloader.
@@ -398,27 +862,32 @@ def get_papers(
         keyword_mode: "any" (default) or "all".
         sleep: seconds between downloads (politeness).
         user_agent: optional UA string for requests.
+        workers: size of the worker pool used for listing fetches and per-paper
+            metadata/PDF downloads; 1 (default) keeps the old sequential behaviour.
+        min_interval: minimum seconds between two requests to the same host,
+            shared by all workers.
+        cache_dir: folder of the persistent HTTP cache for listing and /abs pages
+            (conditional GETs, LRU size cap); None disables caching.
+        index_path: SQLite index of papers processed on any day; papers already
+            covered under another date (any version) are skipped. None disables it.
+        on_pdf: optional callback, called with the path of each newly downloaded
+            PDF as soon as it is saved (from a worker thread), so later stages
+            can start before the whole day is fetched.
 
     Returns:
         {
           "out_dir": <str>,
           "rows": <list of metadata dicts>,
-          "per_category": { "<cat>": {stats...}, ... }
+          "per_category": { "<cat>": {stats...}, ... },
+          "http_cache": {hits, revalidated, misses, evictions, entries, bytes} or None,
+          "transport": {requests, retried, failed, total_seconds, max_seconds}
         }
     """
-    if keyword_mode not in ("any", "all"):
-        raise ValueError("keyword_mode must be 'any' or 'all'")
-
+    cats_list, kw_list = _check_args(keyword_mode, workers, cats, keywords)
     tdate = _target_date(date)
-    cats_list = _normalize_list(cats)
-    kw_list = _keywords_list(keywords)
-    if not cats_list:
-        raise ValueError("--cats produced an empty list")
-    if not kw_list:
-        raise ValueError("--keywords produced an empty list")
 
-    # Compile once so boundaries are enforced consistently across categories.
-    kw_patterns = _compile_keyword_patterns(kw_list)
+    # Build once so boundaries are enforced consistently across categories.
+    matcher = _KeywordMatcher(kw_list, keyword_mode)
 
     out_dir = out or f"arxiv_TITLES_{tdate.isoformat()}"
     os.makedirs(out_dir, exist_ok=True)
@@ -426,38 +895,107 @@ def get_papers(
     print(f"Keywords ({keyword_mode}): {kw_list}")
     print(f"Destination: {os.path.abspath(out_dir)}")
 
-    sess = requests.Session()
-    sess.headers.update({"User-Agent": user_agent or UA_DEFAULT})
-
-    all_rows: List[Dict[str, Any]] = []
-    seen_ids: Set[str] = set()
-    per_cat_stats: Dict[str, Dict[str, int]] = {}
+    transport = Transport(user_agent=user_agent, pool_size=max(workers, 2), min_interval=min_interval)
+    cache = HttpCache(cache_dir) if cache_dir else None
+    index = PaperIndex(index_path) if index_path else None
 
-    for cat in cats_list:
-        rows, stats = _process_category(
-            session=sess,
-            category=cat,
-            tdate=tdate,
-            out_dir=out_dir,
-            kw_patterns=kw_patterns,
-            keyword_mode=keyword_mode,
-            seen_ids=seen_ids,
-            sleep=sleep,
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # Listings are fetched in parallel; map() keeps them in category order.
+        scans = pool.map(
+            lambda cat: _scan_category(transport, cat, tdate, matcher, cache),
+            cats_list,
         )
-        per_cat_stats[cat] = stats
-        all_rows.extend(rows)
-        print(
-            f"[{cat}] New: {len(rows)} (matched {stats['matched']} / scanned {stats['scanned']}; "
-            f"skipped {stats['skipped_existing']} existing, {stats['skipped_duplicate']} duplicates)"
+        result = _run_day(
+            transport, pool, tdate, out_dir, zip(cats_list, scans), sleep, cache, index, on_pdf,
         )
 
-    if not all_rows:
-        print("No new entries downloaded.")
-        return {"out_dir": out_dir, "rows": [], "per_category": per_cat_stats}
+    if index:
+        index.close()
+    result["http_cache"] = _close_cache(cache)
+    result["transport"] = _close_transport(transport)
+    if result["rows"]:
+        print("Done.")
+    return result
+
+def get_papers_range(
+    start: _date | str,
+    end: _date | str,
+    cats: Iterable[str] | str,
+    keywords: Iterable[str] | str,
+    out: str = "arxiv_TITLES_{date}",
+    keyword_mode: str = "any",
+    sleep: float = 0.0,
+    user_agent: Optional[str] = None,
+    workers: int = 1,
+    min_interval: float = 0.0,
+    cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+    index_path: Optional[str] = DEFAULT_INDEX_PATH,
+) -> Dict[str, Any]:
+    """
+    Backfill every announcement day between `start` and `end` (inclusive) that
+    is still on the `recent` listings. Each category page is fetched and parsed
+    once, split by its <h3> day sections, and each day is written to its own
+    folder, `out.format(date="YYYY-MM-DD")` (e.g. "database/{date}").
 
-    _write_metadata(out_dir, all_rows)
+    Days are processed oldest first, so with the paper index enabled a
+    cross-listing is attributed to the first day it appeared on.
+
+    Other arguments are as for `get_papers`.
+
+    Returns:
+        {
+          "days": { "<YYYY-MM-DD>": <get_papers-style result>, ... },
+          "missing": [<YYYY-MM-DD>, ...],   # in range but on no listing page
+          "http_cache": {...} or None,
+          "transport": {...}
+        }
+    """
+    cats_list, kw_list = _check_args(keyword_mode, workers, cats, keywords)
+    first, last = _target_date(start), _target_date(end)
+    if last < first:
+        raise ValueError("end must not be before start")
+    matcher = _KeywordMatcher(kw_list, keyword_mode)
+    print(f"Categories: {cats_list}")
+    print(f"Keywords ({keyword_mode}): {kw_list}")
+    print(f"Dates: {first} .. {last}")
+
+    transport = Transport(user_agent=user_agent, pool_size=max(workers, 2), min_interval=min_interval)
+    cache = HttpCache(cache_dir) if cache_dir else None
+    index = PaperIndex(index_path) if index_path else None
+
+    def _scan_all_days(cat: str) -> Dict[_date, Tuple[List[Dict[str, Any]], int]]:
+        html = _fetch_listing(transport, cat, cache)
+        return {
+            d: _match_entries(_iter_section_entries(fragment), matcher)
+            for d, fragment in _split_sections(html)
+            if first <= d <= last
+        }
+
+    days: Dict[str, Dict[str, Any]] = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        by_cat = dict(zip(cats_list, pool.map(_scan_all_days, cats_list)))
+        found = sorted({d for sections in by_cat.values() for d in sections})
+        for d in found:
+            print(f"--- {d} ---")
+            scans = [(cat, by_cat[cat].get(d, ([], 0))) for cat in cats_list]
+            days[d.isoformat()] = _run_day(
+                transport, pool, d, out.format(date=d.isoformat()), scans, sleep, cache, index,
+            )
+
+    if index:
+        index.close()
+    cache_stats = _close_cache(cache)
+    transport_stats = _close_transport(transport)
+    missing = []
+    d = first
+    while d <= last:
+        if d not in found:
+            missing.append(d.isoformat())
+        d = _date.fromordinal(d.toordinal() + 1)
+    if missing:
+        print("No listing section for: " + ", ".join(missing))
     print("Done.")
-    return {"out_dir": out_dir, "rows": all_rows, "per_category": per_cat_stats}
+    return {"days": days, "missing": missing, "http_cache": cache_stats, "transport": transport_stats}
 
 
 # Backward-compatible alias (some code imports `main`)
@@ -465,4 +1003,49 @@ def main(**kwargs):
     return get_papers(**kwargs)
 
 
-__all__ = ["get_papers", "main"]
+LISTING_FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "listing_recent.html.gz")
+
+def _benchmark(path: str = LISTING_FIXTURE, repeat: int = 3):
+    """
+    Full-tree parse (_find_section_for_date/_iter_entries_between) vs. section
+    slicing (_slice_section_for_date/_iter_section_entries) for every day of a
+    saved listing page (gzipped or plain HTML); both must yield the same entries.
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        html = f.read()
+    days = [day for day, _ in _split_sections(html)]
+
+    def entries(pairs):
+        return [(_extract_abs_id_from_dt(dt), _extract_title_from_dd(dd)) for dt, dd in pairs]
+
+    full_s = slice_s = 0.0
+    n_entries = 0
+    for day in days:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            soup = BeautifulSoup(html, "html.parser")
+            full = entries(_iter_entries_between(_find_section_for_date(soup, day)))
+            full_s += time.perf_counter() - start
+
+            start = time.perf_counter()
+            fragment, _ = _slice_section_for_date(html, day)
+            sliced = entries(_iter_section_entries(fragment))
+            slice_s += time.perf_counter() - start
+
+            assert sliced == full, f"entries differ for {day}"
+        n_entries += len(full)
+
+    runs = len(days) * repeat
+    print(
+        f"{os.path.basename(path)}: {len(days)} days, {n_entries} entries, {len(html) / 1024:.0f} KB; "
+        f"per day: full tree (html.parser) {1000 * full_s / runs:.0f} ms, "
+        f"section slice ({HTML_PARSER}) {1000 * slice_s / runs:.0f} ms"
+    )
+
+
+if __name__ == "__main__":
+    _benchmark(*sys.argv[1:2])
+
+
+__all__ = ["get_papers", "get_papers_range", "is_complete_pdf", "main"]
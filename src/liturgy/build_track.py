@@ -1,8 +1,50 @@
 import os
+import queue
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple, Optional
 from pydub import AudioSegment
-from pydub.effects import normalize
 import numpy as np
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from liturgy.pcm_cache import open_pcm
+from liturgy.mp3_frames import concat_mp3_files, stream_formats, Mp3FormatMismatch
+from liturgy.mixer import BLOCK_FRAMES, mix_background, mix_background_blocks, normalize_clip, blocks_of
+
+SAMPLE_DTYPES = {1: np.int8, 2: np.int16, 4: np.int32}
+
+
+class Rendition(NamedTuple):
+    """One published encoding of an episode."""
+    name: str
+    ext: str                          # also the ffmpeg output format
+    bitrate: Optional[str] = None
+    codec: Optional[str] = None
+    channels: Optional[int] = None    # None keeps the source layout
+    mime: str = "audio/mpeg"
+
+
+# The main episode is frame-copied at the clips' own bitrate whenever
+# possible (see build_track); this bitrate only applies when it is re-encoded.
+MAIN_RENDITION = Rendition("main", "mp3", "128k")
+RENDITIONS = {
+    r.name: r for r in (
+        MAIN_RENDITION,
+        Rendition("mobile", "mp3", "48k", channels=1),
+        Rendition("opus", "opus", "48k", codec="libopus", mime="audio/ogg"),
+    )
+}
+
+
+def rendition_path(output_path, rendition):
+    """episodes/<date>.mp3 -> episodes/<name>/<date>.<ext> (the main rendition keeps `output_path`)."""
+    if rendition.name == MAIN_RENDITION.name:
+        return str(output_path)
+    output_path = Path(output_path)
+    return str(output_path.parent / rendition.name / f"{output_path.stem}.{rendition.ext}")
 
 
 def slow_down_audio(audio_segment, speed_factor):
@@ -20,14 +62,78 @@ def slow_down_audio(audio_segment, speed_factor):
     return slowed_audio
 
 
+def segment_samples(segment):
+    """(frames, channels) view of an AudioSegment's samples, without copying."""
+    samples = np.frombuffer(segment.raw_data, dtype=SAMPLE_DTYPES[segment.sample_width])
+    return samples.reshape(-1, segment.channels)
+
+
+def _conform(segments):
+    """
+    Bring all segments to a common frame rate, channel count and sample width
+    (the highest of each, as pydub's `+` would).
+    """
+    frame_rate = max(s.frame_rate for s in segments)
+    channels = max(s.channels for s in segments)
+    sample_width = max(s.sample_width for s in segments)
+    conformed = [
+        s.set_frame_rate(frame_rate).set_channels(channels).set_sample_width(sample_width)
+        for s in segments
+    ]
+    return conformed, frame_rate, channels, sample_width
+
+
+def stitch_segments(segments, silence_duration=3000, leading_silence=0):
+    """
+    Concatenate segments with `silence_duration` ms of silence between them in
+    linear time: the output buffer is allocated once at its final size (zeros,
+    i.e. the silence is already there) and each clip is copied in at its
+    offset, instead of `+=` copying everything stitched so far on every clip.
+
+    :param segments: List[AudioSegment]; entries are released once copied.
+    :param leading_silence: ms of silence before the first clip.
+    :return: (combined: AudioSegment, starts_ms: List[int]) where the start
+             times come from sample counts.
+    """
+    if not segments:
+        return AudioSegment.silent(duration=leading_silence), []
+
+    segments, frame_rate, channels, sample_width = _conform(segments)
+    for i, segment in enumerate(segments):
+        segments[i] = segment_samples(segment)
+    out, starts_ms = stitch_arrays(segments, frame_rate, silence_duration, leading_silence)
+    combined = AudioSegment(data=out.tobytes(), sample_width=sample_width,
+                            frame_rate=frame_rate, channels=channels)
+    return combined, starts_ms
+
+
+def stitch_arrays(clips, frame_rate, silence_duration=3000, leading_silence=0, target_dbfs=None):
+    """
+    stitch_segments for (frames, channels) sample arrays of one format, e.g.
+    memmaps from a PcmCache. Entries of `clips` are released once copied.
+    With `target_dbfs` each clip is normalized to that loudness on the way
+    (see liturgy.mixer.normalize_clip).
+
+    :return: (samples: np.ndarray, starts_ms: List[int])
+    """
+    gap = frame_rate * silence_duration // 1000
+    lead = frame_rate * leading_silence // 1000
+    lengths = [len(c) for c in clips]
+
+    out = np.zeros((lead + sum(lengths) + gap * (len(clips) - 1), clips[0].shape[1]),
+                   dtype=clips[0].dtype)
+    starts = []
+    cursor = lead
+    for i, n in enumerate(lengths):
+        starts.append(cursor)
+        out[cursor:cursor + n] = clips[i] if target_dbfs is None else normalize_clip(clips[i], target_dbfs)
+        clips[i] = None
+        cursor += n + gap
+    return out, [round(start * 1000 / frame_rate) for start in starts]
+
+
 def stitch_audio_segments_with_silence(segments, silence_duration=3000):
-    combined = AudioSegment.empty()
-    silence = AudioSegment.silent(duration=300)  # 3000 ms = 3 seconds of silence
-    for i, audio in enumerate(segments):
-        combined += audio
-        # Add silence between tracks except after the last track
-        if i < len(segments) - 1:
-            combined += silence
+    combined, _ = stitch_segments(list(segments), silence_duration=300)  # 300 ms between tracks
     return combined
 
 
@@ -39,7 +145,7 @@ def _ms_to_hms(ms: int) -> str:
     return f"{h:d}:{m:02d}:{s:02d}" if h else f"{m:d}:{s:02d}"
 
 def stitch_mp3_files_with_silence(mp3_files, silence_duration=3000,
-                                  add_leading_silence=False):
+                                  add_leading_silence=False, pcm_cache=None, workers=None, target_dbfs=None):
     """
     Combine multiple MP3 files into one, with silence between them, and
     return the start timestamp of each clip within the combined audio.
@@ -48,37 +154,33 @@ def stitch_mp3_files_with_silence(mp3_files, silence_duration=3000,
     :param silence_duration: Duration of silence (ms) between clips.
                              Also used as an optional leading pad before the first clip.
     :param add_leading_silence: If True, prepend `silence_duration` ms before the first clip.
+    :param pcm_cache: Optional PcmCache; clips decoded on an earlier build are
+                      read from it instead of being decoded again.
+    :param workers: Clips decoded at once (default: one per core), see decode_clips.
+    :param target_dbfs: Optional loudness (dBFS RMS) every clip is normalized to.
     :return: (combined: AudioSegment,
               timestamps_ms: List[int],   # start times (ms) of each clip
               timestamps_str: List[str])  # human-readable H:MM:SS.mmm
     """
-    # Start with optional leading silence
-    combined = (AudioSegment.silent(duration=silence_duration)
-                if add_leading_silence else AudioSegment.empty())
-
-    timestamps_ms = []
-    cursor = len(combined)  # where the next clip will start (in ms)
-
-    for i, mp3_file in enumerate(mp3_files):
-        audio = AudioSegment.from_mp3(mp3_file)
-
-        # Record the start time for this clip (relative to the final stitched audio)
-        timestamps_ms.append(cursor)
-
-        # Append the audio
-        combined += audio
-        cursor = len(combined)
-
-        # Add inter-clip silence except after the last track
-        if i < len(mp3_files) - 1:
-            combined += AudioSegment.silent(duration=silence_duration)
-            cursor = len(combined)
+    leading_silence = silence_duration if add_leading_silence else 0
+    if not mp3_files:
+        return AudioSegment.silent(duration=leading_silence), []
+
+    # Each clip is decoded once (in parallel) and copied once into the output buffer.
+    frame_rate, channels = _stream_format(mp3_files)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        clips = decode_clips(mp3_files, frame_rate, channels, tmp_dir, pcm_cache, workers)
+        samples, timestamps_ms = stitch_arrays(clips, frame_rate, silence_duration, leading_silence,
+                                               target_dbfs)
+    combined = AudioSegment(data=samples.tobytes(), sample_width=2,
+                            frame_rate=frame_rate, channels=channels)
 
     timestamps_str = [_ms_to_hms(ms) for ms in timestamps_ms]
     return combined, timestamps_str
 
 
-def add_background_music(main_audio, background_audio_path, foreground_volume=0, background_volume=-20):
+def add_background_music(main_audio, background_audio_path, foreground_volume=0, background_volume=-20,
+                         pcm_cache=None):
     """
     Superimpose background music on the main audio with volume adjustment.
 
@@ -86,33 +188,28 @@ def add_background_music(main_audio, background_audio_path, foreground_volume=0,
     :param background_audio_path: Path to the background music MP3 file
     :param foreground_volume: Volume adjustment for the main audio (in dB)
     :param background_volume: Volume adjustment for the background music (in dB)
+    :param pcm_cache: Optional PcmCache holding the decoded background track
     :return: AudioSegment with background music added
     """
-    background = AudioSegment.from_mp3(background_audio_path)
-
-    # Adjust volumes
-    main_audio = main_audio + foreground_volume
-    main_audio += AudioSegment.silent(duration=5000)
-    background = background + background_volume
-
-    # Loop background music to match the length of the main audio
-    if len(background) < len(main_audio):
-        loop_count = len(main_audio) // len(background) + 1
-        background = background * loop_count
-
-    # effects
-    # print(f"adding reverb")
-    # main_audio = add_reverb(main_audio)
-    # print(f"adding distort")
-    # main_audio = add_distortion(main_audio, gain=1.4)
-    # Trim background to match the exact length of the main audio
-    background = background[: len(main_audio)]
-
+    main_audio = main_audio.set_sample_width(2)
+    if pcm_cache is not None:
+        background = pcm_cache.get(background_audio_path, main_audio.frame_rate, main_audio.channels,
+                                   pcm_blocks)
+    else:
+        background = segment_samples(
+            AudioSegment.from_mp3(background_audio_path)
+            .set_frame_rate(main_audio.frame_rate).set_channels(main_audio.channels).set_sample_width(2)
+        )
+
+    # Main audio gets a 5 s tail over which the looped background fades out.
     fade_duration = 5000  # 5 seconds (in milliseconds)
-    background = background.fade_out(fade_duration)
-
-    # Overlay background music on the main audio
-    return main_audio.overlay(background)
+    mixed = mix_background(
+        segment_samples(main_audio), background,
+        foreground_volume=foreground_volume, background_volume=background_volume,
+        tail_frames=main_audio.frame_rate * fade_duration // 1000,
+    )
+    return AudioSegment(data=mixed.tobytes(), sample_width=2,
+                        frame_rate=main_audio.frame_rate, channels=main_audio.channels)
 
 
 def save_mp3(audio_segment, output_path):
@@ -122,12 +219,275 @@ def save_mp3(audio_segment, output_path):
     audio_segment.export(output_path, format="mp3")
 
 
-def build_track(mp3_files, output_path, overwrite=False):
+def _silence_blocks(n_frames, channels, block_frames=BLOCK_FRAMES):
+    while n_frames > 0:
+        n = min(n_frames, block_frames)
+        yield np.zeros((n, channels), dtype=np.int16)
+        n_frames -= n
+
+
+def pcm_blocks(path, frame_rate, channels, block_frames=BLOCK_FRAMES):
+    """Decode `path` with ffmpeg and yield int16 (frames, channels) blocks as they arrive."""
+    proc = subprocess.Popen(
+        [AudioSegment.converter, "-loglevel", "error", "-i", str(path),
+         "-f", "s16le", "-ac", str(channels), "-ar", str(frame_rate), "-"],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+    )
+    block_bytes = block_frames * channels * 2
+    try:
+        while True:
+            data = proc.stdout.read(block_bytes)
+            if not data:
+                break
+            yield np.frombuffer(data, dtype=np.int16).reshape(-1, channels)
+    finally:
+        proc.stdout.close()
+        err = proc.stderr.read()
+        proc.wait()
+    if proc.returncode:
+        raise RuntimeError(f"Decoding {path} failed: {err.decode(errors='replace')}")
+
+
+def _decode_to_file(path, frame_rate, channels, out_path):
+    with open(out_path, "wb") as f:
+        for block in pcm_blocks(path, frame_rate, channels):
+            f.write(block.data)
+    return out_path
+
+
+def decode_clips(mp3_files, frame_rate, channels, tmp_dir, pcm_cache=None, workers=None):
+    """
+    Decode and conform (frame rate, channels, 16-bit) every clip at once, up
+    to `workers` ffmpeg processes in parallel (default: one per core). Each
+    clip goes to its own raw PCM file, in `pcm_cache` or else in `tmp_dir`,
+    and the clips come back as memmaps in track order.
+    """
+    workers = workers or os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        if pcm_cache is not None:
+            futures = [pool.submit(pcm_cache.get, path, frame_rate, channels, pcm_blocks)
+                       for path in mp3_files]
+            return [f.result() for f in futures]
+        futures = [pool.submit(_decode_to_file, path, frame_rate, channels,
+                               os.path.join(tmp_dir, f"{i:05d}.s16le"))
+                   for i, path in enumerate(mp3_files)]
+        return [open_pcm(f.result(), channels) for f in futures]
+
+
+def _stream_format(mp3_files):
+    """
+    Common frame rate and channel count of the clips (the highest of each),
+    from their frame headers. Clips whose format changes mid-stream (which
+    frame copy rejects) count with every format they use.
+    """
+    frame_rate, channels = 0, 0
+    for path in mp3_files:
+        for rate, n in stream_formats(path):
+            frame_rate = max(frame_rate, rate)
+            channels = max(channels, n)
+    return frame_rate or 44100, channels or 2
+
+
+def _clip_blocks(clips, channels, gap, starts, target_dbfs=None):
+    """
+    PCM blocks of the clips (sample arrays or block iterators) with `gap`
+    frames of silence between them; appends each clip's start frame to
+    `starts`. With `target_dbfs` every clip is first brought to that loudness
+    (one clip is held in memory at a time).
+    """
+    cursor = 0
+    for i, clip in enumerate(clips):
+        if i:
+            yield from _silence_blocks(gap, channels)
+            cursor += gap
+        starts.append(cursor)
+        if target_dbfs is not None:
+            samples = clip if isinstance(clip, np.ndarray) else np.concatenate(list(clip))
+            clip = normalize_clip(samples, target_dbfs)
+        blocks = blocks_of(clip) if isinstance(clip, np.ndarray) else clip
+        for block in blocks:
+            cursor += len(block)
+            yield block
+
+
+def _encoder(output_path, rendition, frame_rate, channels):
+    cmd = [AudioSegment.converter, "-loglevel", "error", "-y",
+           "-f", "s16le", "-ar", str(frame_rate), "-ac", str(channels), "-i", "-"]
+    if rendition.codec:
+        cmd += ["-c:a", rendition.codec]
+    if rendition.bitrate:
+        cmd += ["-b:a", rendition.bitrate]
+    if rendition.channels:
+        cmd += ["-ac", str(rendition.channels)]
+    cmd += ["-f", rendition.ext, f"{output_path}.part"]
+    return subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+
+
+def _feed_encoder(proc, blocks):
+    try:
+        while True:
+            block = blocks.get()
+            if block is None:
+                break
+            proc.stdin.write(block)
+    except BrokenPipeError:
+        # The encoder died; drain so the producer never blocks, the error is reported below.
+        while blocks.get() is not None:
+            pass
+    finally:
+        try:
+            proc.stdin.close()
+        except BrokenPipeError:
+            pass
+
+
+def encode_renditions(blocks, outputs, frame_rate, channels, backlog=8):
+    """
+    Encode one stream of int16 PCM blocks into several renditions at once:
+    one ffmpeg process per (output_path, Rendition) in `outputs`, each fed by
+    its own thread through a queue of at most `backlog` blocks, so the
+    encoders run in parallel and memory use does not depend on the length of
+    the episode. Outputs are written to `<path>.part` and renamed at the end.
+    """
+    encoders = []
+    for path, rendition in outputs:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        proc = _encoder(path, rendition, frame_rate, channels)
+        q = queue.Queue(maxsize=backlog)
+        thread = threading.Thread(target=_feed_encoder, args=(proc, q), daemon=True)
+        thread.start()
+        encoders.append((path, proc, q, thread))
+    try:
+        for block in blocks:
+            data = np.ascontiguousarray(block).tobytes()
+            for _, _, q, _ in encoders:
+                q.put(data)
+    finally:
+        for _, _, q, _ in encoders:
+            q.put(None)
+        errors = []
+        for path, proc, _, thread in encoders:
+            thread.join()
+            err = proc.stderr.read()
+            proc.wait()
+            if proc.returncode:
+                errors.append(f"Encoding {path} failed: {err.decode(errors='replace')}")
+    if errors:
+        raise RuntimeError("\n".join(errors))
+    for path, _, _, _ in encoders:
+        os.replace(f"{path}.part", path)
+
+
+def encode_stream(blocks, output_path, frame_rate, channels, format="mp3", bitrate=None):
+    """
+    Pipe int16 PCM blocks into one ffmpeg encoder as they are produced, so
+    memory use does not depend on the length of the episode.
+    """
+    rendition = Rendition("main", format, bitrate)
+    encode_renditions(blocks, [(output_path, rendition)], frame_rate, channels)
+
+
+def stream_track(mp3_files, output_path, silence_duration=3000, background_audio_path=None,
+                 foreground_volume=0, background_volume=-20, target_dbfs=None, pcm_cache=None,
+                 workers=None, renditions=(MAIN_RENDITION,)):
+    """
+    Decode, stitch, (optionally) mix and encode the episode block by block:
+    each clip is decoded by its own ffmpeg process into fixed-size PCM blocks
+    that go straight into the encoder's stdin. Peak memory is a few blocks
+    (plus the decoded background track), whatever the episode length.
+    `target_dbfs` normalizes the loudness of each clip. With a `pcm_cache`
+    clips and background decoded on earlier builds are read from it.
+
+    Unless `workers=1`, all clips are first decoded in parallel (see
+    decode_clips) to memory-mapped PCM files, so assembly time scales with the
+    cores rather than the number of papers; memory use stays flat.
+
+    Every rendition in `renditions` is encoded from the same PCM stream by
+    its own encoder process (see encode_renditions), at
+    `rendition_path(output_path, rendition)`.
+
+    :return: start time (ms) of each clip, from sample counts.
+    """
+    frame_rate, channels = _stream_format(mp3_files)
+    gap = frame_rate * silence_duration // 1000
+    starts = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if workers == 1 and pcm_cache is None:
+            clips = (pcm_blocks(path, frame_rate, channels) for path in mp3_files)
+        else:
+            clips = decode_clips(mp3_files, frame_rate, channels, tmp_dir, pcm_cache, workers)
+        blocks = _clip_blocks(clips, channels, gap, starts, target_dbfs)
+        if background_audio_path is not None:
+            if pcm_cache is not None:
+                background = pcm_cache.get(background_audio_path, frame_rate, channels, pcm_blocks)
+            else:
+                background = np.concatenate(list(pcm_blocks(background_audio_path, frame_rate, channels)))
+            blocks = mix_background_blocks(blocks, background, foreground_volume, background_volume,
+                                           tail_frames=frame_rate * 5000 // 1000)
+        outputs = [(rendition_path(output_path, r), r) for r in renditions]
+        encode_renditions(blocks, outputs, frame_rate, channels)
+    return [round(start * 1000 / frame_rate) for start in starts]
+
+
+def build_track(mp3_files, output_path, overwrite=False, frame_copy=True, streaming=False,
+                background_audio_path=None, pcm_cache=None, workers=None, renditions=(),
+                target_dbfs=None):
+    """
+    Join the clips into one episode with 3 s of silence between them and
+    return (output_path, start timestamps).
+
+    With `frame_copy` (the default) the MP3 frames are copied without decoding
+    (see liturgy.mp3_frames); clips whose encoding parameters differ fall back
+    to decoding, stitching and re-encoding. With `streaming` that re-encode
+    runs block by block in constant memory (see stream_track).
+    `background_audio_path` mixes in looped background music and `target_dbfs`
+    normalizes every clip to that loudness (dBFS RMS); either rules out the
+    frame copy. A `pcm_cache` (liturgy.pcm_cache.PcmCache) keeps decoded
+    clips and background between builds for the decode paths, which decode
+    up to `workers` clips in parallel (default: one per core).
+
+    The main file keeps the clips' bitrate when the frame copy succeeds and
+    is encoded as MAIN_RENDITION (128k mp3) only on the decode paths.
+    `renditions` (Rendition objects or names from RENDITIONS, e.g. "mobile",
+    "opus") are extra encodings written to `rendition_path(output_path, r)`;
+    they are all encoded in parallel from one decoded stream.
+    """
+    extra = [RENDITIONS[r] if isinstance(r, str) else r for r in renditions]
+    extra = [r for r in extra if r.name != MAIN_RENDITION.name]
+
+    def encode_extra():
+        if extra:
+            print(f"Encoding {', '.join(r.name for r in extra)}...")
+            stream_track(mp3_files, output_path, silence_duration=3000,
+                         background_audio_path=background_audio_path, target_dbfs=target_dbfs,
+                         pcm_cache=pcm_cache, workers=workers, renditions=extra)
+
+    if frame_copy and background_audio_path is None and target_dbfs is None:
+        try:
+            print("Joining MP3 frames with silence...")
+            timestamps_ms = concat_mp3_files(mp3_files, output_path, silence_duration=3000)
+            encode_extra()
+            print("Done!")
+            return output_path, [_ms_to_hms(ms) for ms in timestamps_ms]
+        except Mp3FormatMismatch as e:
+            print(f"Can't join frames ({e}); re-encoding instead")
+
+    if streaming or extra:
+        print("Streaming MP3 files with silence into the encoders...")
+        timestamps_ms = stream_track(mp3_files, output_path, silence_duration=3000,
+                                     background_audio_path=background_audio_path, target_dbfs=target_dbfs,
+                                     pcm_cache=pcm_cache, workers=workers,
+                                     renditions=[MAIN_RENDITION] + extra)
+        print("Done!")
+        return output_path, [_ms_to_hms(ms) for ms in timestamps_ms]
 
     # Stitch the MP3 files with silence
     print("Stitching MP3 files with silence...")
     final_audio, timestamps = stitch_mp3_files_with_silence(mp3_files,
-                                                    silence_duration=3000)
+                                                    silence_duration=3000, pcm_cache=pcm_cache,
+                                                    workers=workers, target_dbfs=target_dbfs)
+    if background_audio_path is not None:
+        final_audio = add_background_music(final_audio, background_audio_path, pcm_cache=pcm_cache)
 
 
     # Save the final audio
@@ -136,3 +496,49 @@ def build_track(mp3_files, output_path, overwrite=False):
     print("Done!")
     return output_path, timestamps
 
+
+
+def _benchmark(n_clips=24, clip_seconds=90, frame_rate=24000):
+    """Legacy `+=` stitching vs. stitch_segments on synthetic clips."""
+    rng = np.random.default_rng(0)
+    clips = []
+    for _ in range(n_clips):
+        samples = (rng.standard_normal(clip_seconds * frame_rate) * 3000).astype(np.int16)
+        clips.append(AudioSegment(data=samples.tobytes(), sample_width=2, frame_rate=frame_rate, channels=1))
+
+    start = time.perf_counter()
+    legacy = AudioSegment.empty()
+    for i, clip in enumerate(clips):
+        legacy += clip
+        if i < len(clips) - 1:
+            legacy += AudioSegment.silent(duration=3000, frame_rate=frame_rate)
+    legacy_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    stitched, _ = stitch_segments(list(clips), silence_duration=3000)
+    stitch_s = time.perf_counter() - start
+
+    assert stitched.raw_data == legacy.raw_data
+    minutes = len(stitched) / 60000
+    print(f"{n_clips} clips, {minutes:.0f} min: += {legacy_s:.2f}s, stitch_segments {stitch_s:.2f}s")
+
+    # Background mix: pydub operators vs. the block mixer.
+    noise = (rng.standard_normal(45 * frame_rate) * 3000).astype(np.int16)
+    background = AudioSegment(data=noise.tobytes(), sample_width=2, frame_rate=frame_rate, channels=1)
+    del legacy, clips
+
+    start = time.perf_counter()
+    main_audio = stitched + AudioSegment.silent(duration=5000, frame_rate=frame_rate)
+    looped = (background - 20) * (len(main_audio) // len(background) + 1)
+    main_audio.overlay(looped[: len(main_audio)].fade_out(5000))
+    pydub_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    mix_background(segment_samples(stitched), segment_samples(background), background_volume=-20,
+                   tail_frames=5 * frame_rate)
+    mixer_s = time.perf_counter() - start
+    print(f"background mix, {minutes:.0f} min: pydub {pydub_s:.2f}s, mix_background {mixer_s:.2f}s")
+
+
+if __name__ == "__main__":
+    _benchmark()
@@ -8,6 +8,8 @@ Fixes included vs. your last version:
 - Correct Spaces endpoint vs. public URL; consistent key prefix (mlcb/…).
 - Stable GUID (the enclosure URL), RFC-2822 pubDate, itunes:duration, episodic type.
 - Correct MIME types on upload.
+- Incremental: episodes whose bytes are already in the Space are not uploaded
+  again (see PublishManifest), so a daily run only sends the new episode.
 
 Requires:
   pip install boto3 feedgen pydub
@@ -17,14 +19,27 @@ Environment/files:
   SPACES_ACCESS.txt  -> first line is Spaces access key
   SPACES_SECRET.txt  -> first line is Spaces secret
   episodes/YYYY-MM-DD.mp3
+  episodes/<rendition>/YYYY-MM-DD.<ext>  (optional extra renditions, e.g. mobile/, opus/;
+                                          each gets its own feed mlcb-<rendition>.xml)
   titles/YYYY-MM-DD.txt           (optional, first line used as title suffix)
   texts/YYYY-MM-DD.txt            (optional, appended to description)
   mlcb.jpg                        (square 1400–3000px RGB)
+  publish_manifest.json           (written: size, mtime, MD5, ETag of each uploaded key)
+
+  SPACES_ENDPOINT / SPACES_PUBLIC_BASE (optional env) point the uploads and the
+  feed URLs at another S3-compatible server, e.g. a local stand-in for testing.
+
+Usage:
+  python3 src/liturgy/feed.py [--force] [--no-listing]
 """
 
+import argparse
+import hashlib
+import json
 import os
 from pathlib import Path
 from datetime import datetime, timezone
+from typing import Dict, List, Optional
 import boto3
 from feedgen.feed import FeedGenerator
 from pydub.utils import mediainfo
@@ -35,8 +50,8 @@ SPACE_NAME = "mlcb"
 REGION = "nyc3"
 
 # S3 API endpoint (boto3) and public base URL for objects
-SPACE_ENDPOINT = f"https://{REGION}.digitaloceanspaces.com"
-PUBLIC_BASE = f"https://{SPACE_NAME}.{REGION}.digitaloceanspaces.com"
+SPACE_ENDPOINT = os.environ.get("SPACES_ENDPOINT", f"https://{REGION}.digitaloceanspaces.com")
+PUBLIC_BASE = os.environ.get("SPACES_PUBLIC_BASE", f"https://{SPACE_NAME}.{REGION}.digitaloceanspaces.com")
 
 # Objects live under this prefix/folder inside the Space
 KEY_PREFIX = "mlcb"
@@ -44,6 +59,12 @@ KEY_PREFIX = "mlcb"
 # Final public feed URL (what you submit to directories)
 FEED_URL = f"{PUBLIC_BASE}/{KEY_PREFIX}/mlcb.xml"
 
+# Enclosure types by extension, for the main feed and the rendition feeds
+MIME_TYPES = {".mp3": "audio/mpeg", ".opus": "audio/ogg", ".ogg": "audio/ogg", ".m4a": "audio/mp4"}
+
+# Record of what has been uploaded, so unchanged episodes are skipped
+PUBLISH_MANIFEST = Path("publish_manifest.json")
+
 # Credentials from local files
 ACCESS_KEY = Path("SPACES_ACCESS.txt").read_text().splitlines()[0].strip()
 SECRET_KEY = Path("SPACES_SECRET.txt").read_text().splitlines()[0].strip()
@@ -80,11 +101,122 @@ def upload_public(key: str, local_path: str, content_type: str) -> str:
     )
     return f"{PUBLIC_BASE}/{key}"
 
-def upload_episode(local_path: str) -> str:
-    """Upload episode to mlcb/episodes/<filename> and return public URL."""
-    file_name = os.path.basename(local_path)
-    key = f"{KEY_PREFIX}/episodes/{file_name}"
-    return upload_public(key, local_path, "audio/mpeg")
+def file_md5(local_path: str) -> str:
+    h = hashlib.md5()
+    with open(local_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+class PublishManifest:
+    """
+    Local record of uploaded objects: {key: {size, mtime_ns, md5, etag, duration}}.
+
+    A file whose size and mtime match its entry is not hashed again, and a
+    file whose MD5 matches what was uploaded (and, given a remote listing,
+    whose object still has the recorded ETag) is not uploaded again. The
+    ffprobe duration is kept with the entry so unchanged episodes are not
+    probed on every run either.
+    """
+
+    def __init__(self, path: Path = PUBLISH_MANIFEST):
+        self.path = Path(path)
+        try:
+            self.entries: Dict[str, dict] = json.loads(self.path.read_text())
+        except (FileNotFoundError, ValueError):
+            self.entries = {}
+        self.uploaded = 0
+        self.skipped = 0
+
+    def md5(self, key: str, local_path: str) -> str:
+        st = os.stat(local_path)
+        entry = self.entries.get(key)
+        if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+            return entry["md5"]
+        return file_md5(local_path)
+
+    def unchanged(self, key: str, md5: str, remote: Optional[Dict[str, str]] = None) -> bool:
+        """True if `key` already holds bytes with this MD5 (checked against `remote` {key: ETag} if given)."""
+        entry = self.entries.get(key)
+        if remote is None:
+            return entry is not None and entry["md5"] == md5
+        etag = remote.get(key)
+        if etag is None:
+            return False
+        # A single-part upload's ETag is its MD5; multipart ETags ("<hash>-<parts>") are matched via the entry.
+        return etag == md5 or (entry is not None and entry["md5"] == md5 and entry["etag"] == etag)
+
+    def record(self, key: str, local_path: str, md5: str, etag: str) -> None:
+        st = os.stat(local_path)
+        old = self.entries.get(key) or {}
+        entry = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "md5": md5, "etag": etag}
+        if old.get("md5") == md5 and "duration" in old:
+            entry["duration"] = old["duration"]
+        self.entries[key] = entry
+
+    def duration(self, key: str, local_path: str) -> str:
+        """HH:MM:SS of a recorded key, probed once per version of the file."""
+        entry = self.entries[key]
+        if "duration" not in entry:
+            entry["duration"] = get_mp3_duration_hhmmss(local_path)
+            self.save()
+        return entry["duration"]
+
+    def save(self) -> None:
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(self.entries, indent=1, sort_keys=True))
+        os.replace(tmp, self.path)
+
+def list_remote(prefix: str = KEY_PREFIX) -> Dict[str, str]:
+    """{key: ETag} of every object under `prefix`/ (one request per 1000 keys)."""
+    etags = {}
+    for page in client.get_paginator("list_objects_v2").paginate(Bucket=SPACE_NAME, Prefix=f"{prefix}/"):
+        for obj in page.get("Contents", []):
+            etags[obj["Key"]] = obj["ETag"].strip('"')
+    return etags
+
+def publish(key: str, local_path: str, content_type: str, manifest: PublishManifest,
+            remote: Optional[Dict[str, str]] = None) -> str:
+    """upload_public, unless the manifest (and `remote` listing) show the same bytes are already there."""
+    md5 = manifest.md5(key, local_path)
+    if manifest.unchanged(key, md5, remote):
+        manifest.skipped += 1
+        etag = remote[key] if remote is not None else manifest.entries[key]["etag"]
+    else:
+        upload_public(key, local_path, content_type)
+        etag = client.head_object(Bucket=SPACE_NAME, Key=key)["ETag"].strip('"')
+        manifest.uploaded += 1
+    manifest.record(key, local_path, md5, etag)
+    manifest.save()
+    return f"{PUBLIC_BASE}/{key}"
+
+def episode_key(local_path: str, rendition: Optional[str] = None) -> str:
+    """mlcb/episodes/[<rendition>/]<filename>"""
+    folder = f"episodes/{rendition}" if rendition else "episodes"
+    return f"{KEY_PREFIX}/{folder}/{os.path.basename(local_path)}"
+
+def upload_episode(local_path: str, rendition: Optional[str] = None,
+                   manifest: Optional[PublishManifest] = None, remote: Optional[Dict[str, str]] = None) -> str:
+    """
+    Upload episode to mlcb/episodes/[<rendition>/]<filename> and return public URL.
+    With a `manifest`, an episode that is already uploaded is skipped.
+    """
+    key = episode_key(local_path, rendition)
+    content_type = MIME_TYPES[Path(local_path).suffix]
+    if manifest is None:
+        return upload_public(key, local_path, content_type)
+    return publish(key, local_path, content_type, manifest, remote)
+
+def feed_name(rendition: Optional[str] = None) -> str:
+    """mlcb.xml for the main feed, mlcb-<rendition>.xml for the others."""
+    return f"mlcb-{rendition}.xml" if rendition else "mlcb.xml"
+
+def list_renditions() -> List[str]:
+    """Names of the extra renditions: the subfolders of episodes/."""
+    episodes_dir = Path("episodes")
+    if not episodes_dir.exists():
+        return []
+    return sorted(p.name for p in episodes_dir.iterdir() if p.is_dir())
 
 def pubdate_from_filename(date_str: str) -> datetime:
     """YYYY-MM-DD -> datetime at 00:00:00 UTC (Apple wants RFC-2822; feedgen formats it)."""
@@ -93,14 +225,22 @@ def pubdate_from_filename(date_str: str) -> datetime:
 
 # ---------- Feed generation ----------
 
-def update_feed():
+def update_feed(rendition: Optional[str] = None, manifest: Optional[PublishManifest] = None,
+                remote: Optional[Dict[str, str]] = None):
+    """
+    Build and upload the feed of one rendition (None = the main mp3 feed).
+    With a `manifest` (and a `remote` listing from list_remote), only new or
+    changed episodes are uploaded.
+    """
+    feed_url = f"{PUBLIC_BASE}/{KEY_PREFIX}/{feed_name(rendition)}"
     fg = FeedGenerator()
     fg.load_extension("podcast")  # adds itunes namespace
 
     # Channel metadata (meets Apple requirements)
-    fg.id(FEED_URL)
-    fg.title("Machine Learning in Computational Biology: Daily Digest")
-    fg.link(href=FEED_URL, rel="self")  # RSS self-link
+    fg.id(feed_url)
+    title = "Machine Learning in Computational Biology: Daily Digest"
+    fg.title(f"{title} ({rendition})" if rendition else title)
+    fg.link(href=feed_url, rel="self")  # RSS self-link
     fg.link(href=f"{PUBLIC_BASE}/{KEY_PREFIX}", rel="alternate")
     fg.language("en")
     fg.description(
@@ -125,26 +265,30 @@ def update_feed():
     )
 
     # Collect local episodes
-    episodes_dir = Path("episodes")
+    episodes_dir = Path("episodes") / rendition if rendition else Path("episodes")
     if not episodes_dir.exists():
-        print("No episodes/ directory found.")
+        print(f"No {episodes_dir}/ directory found.")
         return
 
     notes_msg = "Source code: https://github.com/OliverLaboratory/arxivreader"
 
     # Sorted so feed is stable (YYYY-MM-DD lexicographic works)
-    for mp3 in sorted(episodes_dir.glob("*.mp3")):
+    episodes = [p for p in episodes_dir.iterdir() if p.is_file() and p.suffix in MIME_TYPES]
+    for mp3 in sorted(episodes):
         date_str = mp3.stem  # YYYY-MM-DD
         try:
             pub_dt = pubdate_from_filename(date_str)
         except ValueError:
-            print(f"Skipping {mp3.name}: filename must be YYYY-MM-DD.mp3")
+            print(f"Skipping {mp3.name}: filename must be YYYY-MM-DD{mp3.suffix}")
             continue
 
         # Upload episode and gather metadata
-        audio_url = upload_episode(str(mp3))
+        audio_url = upload_episode(str(mp3), rendition, manifest, remote)
         size_bytes = os.path.getsize(mp3)
-        duration = get_mp3_duration_hhmmss(str(mp3))
+        if manifest is not None:
+            duration = manifest.duration(episode_key(str(mp3), rendition), str(mp3))
+        else:
+            duration = get_mp3_duration_hhmmss(str(mp3))
 
         title_suffix = Path(f"titles/{date_str}.txt").read_text(encoding="utf-8").splitlines()[0].strip() if Path(f"titles/{date_str}.txt").exists() else "Daily Digest"
         notes = Path(f"texts/{date_str}.txt").read_text(encoding="utf-8") if Path(f"texts/{date_str}.txt").exists() else ""
@@ -157,7 +301,7 @@ def update_feed():
         fe.title(ep_title)
         fe.description(description)
         fe.pubDate(pub_dt)  # feedgen renders RFC-2822
-        fe.enclosure(audio_url, size_bytes, "audio/mpeg")
+        fe.enclosure(audio_url, size_bytes, MIME_TYPES[mp3.suffix])
         fe.guid(audio_url, permalink=True)               # stable ID = enclosure URL
         fe.podcast.itunes_explicit("no")
         fe.podcast.itunes_episode_type("full")
@@ -175,18 +319,34 @@ def update_feed():
         ET.SubElement(
             channel,
             f"{{{ATOM_NS}}}link",
-            {"href": FEED_URL, "rel": "self", "type": "application/rss+xml"},
+            {"href": feed_url, "rel": "self", "type": "application/rss+xml"},
         )
 
-    local_feed = "mlcb.xml"
+    local_feed = feed_name(rendition)
     ET.ElementTree(root).write(local_feed, encoding="utf-8", xml_declaration=True)
 
-    # Upload feed to mlcb/mlcb.xml
+    # Upload feed to mlcb/mlcb.xml (mlcb/mlcb-<rendition>.xml)
     upload_public(f"{KEY_PREFIX}/{Path(local_feed).name}", local_feed, "application/rss+xml; charset=utf-8")
-    print(f"Podcast feed generated and uploaded: {FEED_URL}")
+    print(f"Podcast feed generated and uploaded: {feed_url}")
 
 def main():
-    update_feed()
+    parser = argparse.ArgumentParser(description="Build the podcast feeds and upload new or changed episodes.")
+    parser.add_argument("--force", action="store_true", help="Upload every episode again")
+    parser.add_argument("--no-listing", action="store_true",
+                        help="Trust the local manifest instead of listing the objects in the Space")
+    args = parser.parse_args()
+
+    manifest = PublishManifest()
+    if args.force:
+        manifest.entries.clear()
+        remote = {}
+    else:
+        remote = None if args.no_listing else list_remote()
+
+    update_feed(manifest=manifest, remote=remote)
+    for rendition in list_renditions():
+        update_feed(rendition, manifest, remote)
+    print(f"Episodes uploaded: {manifest.uploaded}, already up to date: {manifest.skipped}")
 
 if __name__ == "__main__":
     main()
@@ -1,15 +1,36 @@
+import atexit
+import threading
+
 import requests
 from bs4 import BeautifulSoup
 from datetime import datetime
 
+from liturgy.transport import Transport
+
+UA_LITURGY = "arxivreader liturgy fetcher (requests)"
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def _shared_transport():
+    """One Transport for every fetch_liturgy call in this process, closed at exit."""
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = Transport(user_agent=UA_LITURGY, pool_size=2, timeout=30)
+            atexit.register(_transport.close)
+        return _transport
+
 
-def fetch_liturgy(query_date, hour="lauds"):
+def fetch_liturgy(query_date, hour="lauds", transport=None):
     # Universalis URL for today's Liturgy of the Hours
     url = f"https://universalis.com/{query_date}/{hour}.htm"
+    transport = transport or _shared_transport()
 
     try:
-        # Fetch the webpage
-        response = requests.get(url)
+        # Fetch the webpage (pooled session, retries with backoff, timeout)
+        response = transport.get(url)
         response.raise_for_status()
     except requests.exceptions.RequestException as e:
         print(f"Error fetching Universalis content: {e}")
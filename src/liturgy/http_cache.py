@@ -0,0 +1,181 @@
+"""
+http_cache.py
+
+Small persistent HTTP response cache for the arXiv scraper.
+
+Bodies are stored as files under `root/` and indexed in SQLite together with
+their ETag / Last-Modified validators. A lookup either:
+  - revalidates a stored entry with a conditional GET (If-None-Match / If-Modified-Since),
+    reusing the stored body on 304,
+  - fetches and stores the response on a miss, or
+  - with `max_age` > 0 (opt-in), serves an entry younger than `max_age` seconds
+    without touching the network.
+
+Revalidation is the default because listing pages change at announcement
+time: a window without requests could serve yesterday's listing right after
+the new day appears, while a 304 costs little.
+
+The total body size is capped at `max_bytes`; least recently used entries are
+evicted first. Counters are available from `stats()`.
+
+Only meant for small text pages (listings, /abs pages); PDFs are not cached here.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import requests
+
+DEFAULT_CACHE_DIR = os.path.join("database", "http_cache")
+
+
+class HttpCache:
+    def __init__(
+        self,
+        root: str = DEFAULT_CACHE_DIR,
+        max_bytes: int = 256 * 1024 * 1024,
+        max_age: float = 0.0,
+    ):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(root, "index.sqlite"), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " url TEXT PRIMARY KEY, fname TEXT NOT NULL, etag TEXT, last_modified TEXT,"
+            " size INTEGER NOT NULL, stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._db.commit()
+        self.counters: Dict[str, int] = {
+            "hits": 0, "revalidated": 0, "misses": 0, "evictions": 0,
+        }
+
+    # ------------------------- public API -------------------------
+
+    def fetch(self, url: str, send: Callable[[Dict[str, str]], requests.Response]) -> str:
+        """
+        Return the body text of `url`. `send(headers)` is called with
+        conditional headers when a copy is stored (skipped only within an
+        opt-in `max_age`). `send` must perform the GET with the given extra
+        headers and return the response.
+        """
+        entry = self._lookup(url)
+        now = time.time()
+        if entry is not None and now - entry["stored_at"] < self.max_age:
+            body = self._read_body(entry)
+            if body is not None:
+                self._touch(url, now)
+                self._count("hits")
+                return body
+
+        headers: Dict[str, str] = {}
+        if entry is not None:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        r = send(headers)
+        if r.status_code == 304 and entry is not None:
+            body = self._read_body(entry)
+            if body is not None:
+                self._refresh(url, r, now)
+                self._count("revalidated")
+                return body
+            # Body vanished from disk; fetch unconditionally.
+            r = send({})
+
+        r.raise_for_status()
+        body = r.text
+        self._store(url, r, body, now)
+        self._count("misses")
+        return body
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            row = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+            return {**self.counters, "entries": row[0], "bytes": row[1]}
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    # ------------------------- internals -------------------------
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.counters[key] += 1
+
+    def _lookup(self, url: str) -> Optional[Dict[str, object]]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT fname, etag, last_modified, stored_at FROM entries WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"fname": row[0], "etag": row[1], "last_modified": row[2], "stored_at": row[3]}
+
+    def _read_body(self, entry: Dict[str, object]) -> Optional[str]:
+        try:
+            with open(os.path.join(self.root, entry["fname"]), "r", encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _touch(self, url: str, now: float) -> None:
+        with self._lock:
+            self._db.execute("UPDATE entries SET accessed_at = ? WHERE url = ?", (now, url))
+            self._db.commit()
+
+    def _refresh(self, url: str, r: requests.Response, now: float) -> None:
+        """A 304 restarts the freshness window and may carry updated validators."""
+        with self._lock:
+            self._db.execute(
+                "UPDATE entries SET stored_at = ?, accessed_at = ?,"
+                " etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) WHERE url = ?",
+                (now, now, r.headers.get("ETag"), r.headers.get("Last-Modified"), url),
+            )
+            self._db.commit()
+
+    def _store(self, url: str, r: requests.Response, body: str, now: float) -> None:
+        fname = hashlib.sha1(url.encode("utf-8")).hexdigest() + ".body"
+        data = body.encode("utf-8")
+        path = os.path.join(self.root, fname)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries"
+                " (url, fname, etag, last_modified, size, stored_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, fname, r.headers.get("ETag"), r.headers.get("Last-Modified"), len(data), now, now),
+            )
+            self._evict_locked()
+            self._db.commit()
+
+    def _evict_locked(self) -> None:
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._db.execute("SELECT url, fname, size FROM entries ORDER BY accessed_at ASC").fetchall()
+        for url, fname, size in rows:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.root, fname))
+            except OSError:
+                pass
+            self._db.execute("DELETE FROM entries WHERE url = ?", (url,))
+            total -= size
+            self.counters["evictions"] += 1
+
+
+__all__ = ["HttpCache", "DEFAULT_CACHE_DIR"]
@@ -0,0 +1,176 @@
+"""
+mixer.py
+
+NumPy mixing primitives for build_track.
+
+Audio is handled as int16 arrays of shape (frames, channels), which is what
+pydub's raw_data and ffmpeg's s16le output look like. Work is done in
+float32 one fixed-size block at a time, so a long episode never needs more
+than a block of temporaries. This replaces chains of pydub operators, each
+of which makes a full-length copy: `+ dB` for gain, `* n` for looping,
+slicing, `fade_out` and `overlay`.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+
+BLOCK_FRAMES = 1 << 16
+INT16_MIN, INT16_MAX = -32768, 32767
+
+
+def db_to_gain(db: float) -> np.float32:
+    return np.float32(10 ** (db / 20))
+
+
+def to_int16(x: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Clip float samples to the int16 range and convert (into `out` if given)."""
+    np.clip(x, INT16_MIN, INT16_MAX, out=x)
+    if out is None:
+        return x.astype(np.int16)
+    out[...] = x
+    return out
+
+
+def _loop_runs(length: int, start: int, n: int):
+    """(source offset, output offset, count) runs covering frames [start, start + n) of a loop of `length`."""
+    pos = start % length
+    done = 0
+    while done < n:
+        k = min(n - done, length - pos)
+        yield pos, done, k
+        done += k
+        pos = 0
+
+
+def loop_slice(source: np.ndarray, start: int, n: int) -> np.ndarray:
+    """Frames [start, start + n) of `source` repeated forever, by modulo indexing (no tiling)."""
+    out = np.empty((n,) + source.shape[1:], dtype=source.dtype)
+    for pos, done, k in _loop_runs(len(source), start, n):
+        out[done:done + k] = source[pos:pos + k]
+    return out
+
+
+def add_looped(out: np.ndarray, source: np.ndarray, start: int) -> np.ndarray:
+    """`out += loop_slice(source, start, len(out))` in place, without the temporary."""
+    for pos, done, k in _loop_runs(len(source), start, len(out)):
+        out[done:done + k] += source[pos:pos + k]
+    return out
+
+
+def fade(x: np.ndarray, start: int, length: int, fade_in: bool = False) -> np.ndarray:
+    """
+    Apply the part of a linear fade of `length` frames that covers `x`, where
+    `x` starts `start` frames into the fade. Works in place on float arrays.
+    """
+    ramp = np.arange(start, start + len(x), dtype=np.float32) / np.float32(length)
+    np.clip(ramp, 0.0, 1.0, out=ramp)
+    if not fade_in:
+        ramp = 1.0 - ramp
+    x *= ramp[:, None]
+    return x
+
+
+def loudness_dbfs(samples: np.ndarray) -> float:
+    """RMS level of int16 samples in dBFS (-inf for digital silence)."""
+    if not len(samples):
+        return float("-inf")
+    x = samples.astype(np.float32)
+    rms = float(np.sqrt(np.mean(x * x)))
+    return 20 * np.log10(rms / 32768) if rms > 0 else float("-inf")
+
+
+def normalize_clip(samples: np.ndarray, target_dbfs: float = -20.0, max_peak_dbfs: float = -1.0,
+                   block_frames: int = BLOCK_FRAMES) -> np.ndarray:
+    """
+    Bring a clip to `target_dbfs` RMS, lowering the gain if that would push
+    its peak above `max_peak_dbfs`. Returns a new int16 array.
+    """
+    level = loudness_dbfs(samples)
+    out = np.empty_like(samples)
+    if level == float("-inf"):
+        out[...] = samples
+        return out
+    peak = int(np.abs(samples.astype(np.int32)).max())
+    peak_dbfs = 20 * np.log10(peak / 32768)
+    gain = db_to_gain(min(target_dbfs - level, max_peak_dbfs - peak_dbfs))
+    for i in range(0, len(samples), block_frames):
+        block = samples[i:i + block_frames].astype(np.float32)
+        block *= gain
+        to_int16(block, out[i:i + block_frames])
+    return out
+
+
+def blocks_of(samples: np.ndarray, block_frames: int = BLOCK_FRAMES) -> Iterator[np.ndarray]:
+    """Views of `samples` in blocks of `block_frames` frames."""
+    for i in range(0, len(samples), block_frames):
+        yield samples[i:i + block_frames]
+
+
+def mix_background_blocks(
+    blocks: Iterable[np.ndarray],
+    background: np.ndarray,
+    foreground_volume: float = 0,
+    background_volume: float = -20,
+    tail_frames: int = 0,
+    block_frames: int = BLOCK_FRAMES,
+) -> Iterator[np.ndarray]:
+    """
+    Overlay looped `background` (int16, same rate and channels) on a stream of
+    int16 blocks, with gains in dB. `tail_frames` of silence are appended and
+    the background fades out linearly over them. Yields int16 blocks
+    (clipped).
+    """
+    fg_gain = db_to_gain(foreground_volume)
+    # The background is short, so it is scaled once up front.
+    bg = background.astype(np.float32)
+    bg *= db_to_gain(background_volume)
+    pos = 0
+
+    for block in blocks:
+        out = block.astype(np.float32)
+        if fg_gain != 1:
+            out *= fg_gain
+        add_looped(out, bg, pos)
+        pos += len(block)
+        yield to_int16(out)
+    for start in range(0, tail_frames, block_frames):
+        n = min(block_frames, tail_frames - start)
+        out = loop_slice(bg, pos, n)
+        fade(out, start, tail_frames)
+        pos += n
+        yield to_int16(out)
+
+
+def mix_background(
+    main: np.ndarray,
+    background: np.ndarray,
+    foreground_volume: float = 0,
+    background_volume: float = -20,
+    tail_frames: int = 0,
+    block_frames: int = BLOCK_FRAMES,
+) -> np.ndarray:
+    """mix_background_blocks over a whole array, into one preallocated int16 output."""
+    out = np.empty((len(main) + tail_frames, main.shape[1]), dtype=np.int16)
+    pos = 0
+    for block in mix_background_blocks(blocks_of(main, block_frames), background, foreground_volume,
+                                       background_volume, tail_frames, block_frames):
+        out[pos:pos + len(block)] = block
+        pos += len(block)
+    return out
+
+
+__all__ = [
+    "db_to_gain",
+    "to_int16",
+    "loop_slice",
+    "add_looped",
+    "fade",
+    "loudness_dbfs",
+    "normalize_clip",
+    "blocks_of",
+    "mix_background_blocks",
+    "mix_background",
+]
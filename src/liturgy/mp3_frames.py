@@ -0,0 +1,272 @@
+"""
+mp3_frames.py
+
+Frame-level MP3 concatenation for build_track.
+
+The per-paper clips all come from the same TTS encoder, so instead of
+decoding them to PCM and re-encoding the whole episode, their MPEG audio
+frames are copied into the output as is:
+
+  - ID3v2 tags at the start and ID3v1/APE tags at the end are skipped
+  - the Xing/Info (or VBRI) frame at the start of each clip is dropped
+  - gaps are filled with silent frames: a header followed by all-zero side
+    information (no main data), which decoders play as digital silence
+  - one new Xing/Info frame with the total frame and byte counts is written
+    first, so players show the right duration
+  - clip start times come from frame counts (samples per frame / sample rate)
+
+Only MPEG Layer III is handled. Clips that differ in MPEG version, sample
+rate or mono/stereo raise Mp3FormatMismatch so callers can fall back to the
+decode-and-re-encode path. There is no generation loss and the cost is one
+sequential read and write of the data.
+"""
+
+from __future__ import annotations
+
+import os
+import struct
+from typing import List, NamedTuple, Optional, Set, Tuple
+
+# Index 0 ("free") and 15 ("bad") are not supported.
+BITRATES_KBPS = {
+    1: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+SAMPLE_RATES = {
+    1: (44100, 48000, 32000),
+    2: (22050, 24000, 16000),
+    25: (11025, 12000, 8000),
+}
+_VERSION_BITS = {0b11: 1, 0b10: 2, 0b00: 25}
+_VERSION_CODES = {v: bits for bits, v in _VERSION_BITS.items()}
+MONO = 0b11
+
+
+class Mp3FormatMismatch(ValueError):
+    """Raised when clips can't be joined at the frame level."""
+
+
+class FrameHeader(NamedTuple):
+    version: int        # 1, 2 or 25 (MPEG 2.5)
+    bitrate_index: int
+    sample_rate: int
+    padding: int
+    protected: bool     # a 16-bit CRC follows the header
+    channel_mode: int
+    raw: bytes
+
+    @property
+    def mono(self) -> bool:
+        return self.channel_mode == MONO
+
+    @property
+    def samples(self) -> int:
+        return 1152 if self.version == 1 else 576
+
+    @property
+    def length(self) -> int:
+        kbps = BITRATES_KBPS[1 if self.version == 1 else 2][self.bitrate_index]
+        factor = 144_000 if self.version == 1 else 72_000
+        return factor * kbps // self.sample_rate + self.padding
+
+    @property
+    def side_info_length(self) -> int:
+        if self.version == 1:
+            return 17 if self.mono else 32
+        return 9 if self.mono else 17
+
+    @property
+    def params(self) -> Tuple[int, int, bool]:
+        """What has to match for frames of two clips to be joined."""
+        return self.version, self.sample_rate, self.mono
+
+
+def parse_header(data: bytes, pos: int) -> Optional[FrameHeader]:
+    """Parse the Layer III frame header at `pos`; None if there is none."""
+    if pos + 4 > len(data) or data[pos] != 0xFF or (data[pos + 1] & 0xE0) != 0xE0:
+        return None
+    b1, b2, b3 = data[pos + 1], data[pos + 2], data[pos + 3]
+    version = _VERSION_BITS.get((b1 >> 3) & 0b11)
+    layer = (b1 >> 1) & 0b11
+    bitrate_index = b2 >> 4
+    rate_index = (b2 >> 2) & 0b11
+    if version is None or layer != 0b01 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    return FrameHeader(
+        version=version,
+        bitrate_index=bitrate_index,
+        sample_rate=SAMPLE_RATES[version][rate_index],
+        padding=(b2 >> 1) & 1,
+        protected=not (b1 & 1),
+        channel_mode=b3 >> 6,
+        raw=bytes(data[pos:pos + 4]),
+    )
+
+
+def _id3v2_size(data: bytes) -> int:
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    size = 0
+    for b in data[6:10]:
+        size = (size << 7) | (b & 0x7F)  # syncsafe integer
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _audio_end(data: bytes) -> int:
+    """Offset where trailing tags (ID3v1, APEv2) start."""
+    end = len(data)
+    if end >= 128 and data[end - 128:end - 125] == b"TAG":
+        end -= 128
+    if end >= 32 and data[end - 32:end - 24] == b"APETAGEX":
+        size = struct.unpack("<I", data[end - 20:end - 16])[0]
+        flags = struct.unpack("<I", data[end - 12:end - 8])[0]
+        end -= size + (32 if flags & 0x80000000 else 0)
+    return max(end, 0)
+
+
+def _is_info_frame(data: bytes, pos: int, header: FrameHeader) -> bool:
+    """True for the Xing/Info or VBRI frame encoders put first (metadata, not audio)."""
+    offset = pos + 4 + (2 if header.protected else 0)
+    tag = data[offset + header.side_info_length:offset + header.side_info_length + 4]
+    return tag in (b"Xing", b"Info") or data[pos + 36:pos + 40] == b"VBRI"
+
+
+def _iter_frames(data: bytes):
+    """(start, end, header) of each audio frame in `data` (tags and the Xing/Info frame skipped)."""
+    pos = _id3v2_size(data)
+    end = _audio_end(data)
+    synced = False
+    while pos + 4 <= end:
+        header = parse_header(data, pos)
+        if header is None:
+            pos += 1
+            continue
+        nxt = pos + header.length
+        if nxt > end:
+            break  # truncated last frame
+        # Require the next frame to line up too, so stray 0xFF bytes aren't taken for a sync.
+        if nxt + 4 <= end and parse_header(data, nxt) is None:
+            pos += 1
+            continue
+        if not synced:
+            synced = True
+            if _is_info_frame(data, pos, header):
+                pos = nxt
+                continue
+        yield pos, nxt, header
+        pos = nxt
+
+
+def read_frames(path: str | os.PathLike) -> Tuple[List[bytes], Optional[FrameHeader]]:
+    """
+    Audio frames of an MP3 file (tags and the Xing/Info frame removed) and the
+    header of its first audio frame.
+
+    :raises Mp3FormatMismatch: if the frame parameters change mid-stream.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    frames: List[bytes] = []
+    first: Optional[FrameHeader] = None
+    for start, end, header in _iter_frames(data):
+        if first is None:
+            first = header
+        elif header.params != first.params:
+            raise Mp3FormatMismatch(f"{path}: frame parameters change mid-stream")
+        frames.append(data[start:end])
+    return frames, first
+
+
+def stream_formats(path: str | os.PathLike) -> Set[Tuple[int, int]]:
+    """Every (sample rate, channels) used by the frames of an MP3 file; never raises on a change."""
+    with open(path, "rb") as f:
+        data = f.read()
+    return {(h.sample_rate, 1 if h.mono else 2) for _, _, h in _iter_frames(data)}
+
+
+def _make_header(like: FrameHeader, bitrate_index: int) -> bytes:
+    b1 = 0xE0 | (_VERSION_CODES[like.version] << 3) | (0b01 << 1) | 1  # Layer III, no CRC
+    rate_index = SAMPLE_RATES[like.version].index(like.sample_rate)
+    b2 = (bitrate_index << 4) | (rate_index << 2)
+    b3 = like.channel_mode << 6
+    return bytes((0xFF, b1, b2, b3))
+
+
+def silent_frame(like: FrameHeader) -> bytes:
+    """Smallest frame with the parameters of `like` and zeroed side info (decodes to silence)."""
+    header = parse_header(_make_header(like, 1), 0)
+    return header.raw + bytes(header.length - 4)
+
+
+def info_frame(like: FrameHeader, n_frames: int, n_bytes: int, vbr: bool) -> bytes:
+    """Xing (VBR) or Info (CBR) frame carrying the total frame and byte counts."""
+    needed = 4 + like.side_info_length + 16
+    for index in range(1, 15):
+        header = parse_header(_make_header(like, index), 0)
+        if header.length >= needed:
+            break
+    frame = bytearray(header.length)
+    frame[:4] = header.raw
+    offset = 4 + header.side_info_length
+    # Flags: frames and bytes fields present.
+    frame[offset:offset + 16] = (b"Xing" if vbr else b"Info") + struct.pack(">III", 0x3, n_frames, n_bytes)
+    return bytes(frame)
+
+
+def concat_mp3_files(mp3_files, output_path, silence_duration=3000, add_leading_silence=False) -> List[int]:
+    """
+    Join MP3 files at the frame level with `silence_duration` ms of silent
+    frames between them (and before the first, if `add_leading_silence`).
+
+    :return: start time (ms) of each clip in the output, from frame counts.
+    :raises Mp3FormatMismatch: if the clips differ in version, sample rate or
+            channel count, or a file has no MPEG Layer III frames.
+    """
+    clips = []
+    like = None
+    for path in mp3_files:
+        frames, header = read_frames(path)
+        if header is None:
+            raise Mp3FormatMismatch(f"{path}: no MPEG Layer III frames")
+        if like is not None and header.params != like.params:
+            raise Mp3FormatMismatch(f"{path}: {header.params} differs from {like.params}")
+        like = like or header
+        clips.append(frames)
+    if not clips:
+        raise Mp3FormatMismatch("no input files")
+
+    silence = silent_frame(like)
+    gap_frames = round(silence_duration * like.sample_rate / 1000 / like.samples)
+
+    starts_ms = []
+    n_frames = 0
+    n_bytes = 0
+    bitrates = set()
+    layout = []  # (n_silent_frames_before, frames)
+    for i, frames in enumerate(clips):
+        gap = gap_frames if (i > 0 or add_leading_silence) else 0
+        n_frames += gap
+        n_bytes += gap * len(silence)
+        starts_ms.append(round(n_frames * like.samples * 1000 / like.sample_rate))
+        n_frames += len(frames)
+        n_bytes += sum(len(f) for f in frames)
+        bitrates.update(f[2] >> 4 for f in frames)
+        if gap:
+            bitrates.add(silence[2] >> 4)  # silent frames use the lowest bitrate
+        layout.append((gap, frames))
+
+    # The Info frame counts the audio frames after it and the bytes of the whole stream.
+    info_length = len(info_frame(like, 0, 0, vbr=False))
+    info = info_frame(like, n_frames, n_bytes + info_length, vbr=len(bitrates) > 1)
+    tmp = f"{output_path}.part"
+    with open(tmp, "wb") as out:
+        out.write(info)
+        for gap, frames in layout:
+            out.write(silence * gap)
+            out.writelines(frames)
+    os.replace(tmp, output_path)
+    return starts_ms
+
+
+__all__ = ["concat_mp3_files", "read_frames", "stream_formats", "silent_frame", "Mp3FormatMismatch", "FrameHeader"]
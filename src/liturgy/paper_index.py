@@ -0,0 +1,105 @@
+"""
+paper_index.py
+
+Persistent, cross-day index of every arXiv paper the pipeline has touched.
+
+One SQLite row per base id (no version suffix) with the latest version seen,
+the announcement date it was processed under, the source category, the PDF
+path and a pipeline status:
+
+  - "downloaded": PDF fetched and verified
+  - "failed":     PDF download failed; the paper may be retried on a later day
+  - "summarized": summary audio produced
+
+The scraper consults it before any metadata fetch or download so that
+cross-listings on later days and new versions (v2, v3, ...) of a paper that
+was already covered are not downloaded and summarized again.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+DEFAULT_INDEX_PATH = os.path.join("database", "papers.sqlite")
+
+_BASE_ID_RE = re.compile(r"(\d{4}\.\d{4,5})(v\d+)?")
+
+
+def split_arxiv_id(arxiv_id: str) -> tuple:
+    """'2510.12345v2' -> ('2510.12345', 'v2'); ids we can't parse are returned as-is."""
+    m = _BASE_ID_RE.search(arxiv_id)
+    if not m:
+        return arxiv_id, None
+    return m.group(1), m.group(2)
+
+
+class PaperIndex:
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS papers ("
+            " base_id TEXT PRIMARY KEY, version TEXT, date TEXT NOT NULL, category TEXT,"
+            " status TEXT NOT NULL, pdf_path TEXT, updated_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def get(self, arxiv_id: str) -> Optional[Dict[str, Any]]:
+        base_id, _ = split_arxiv_id(arxiv_id)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT base_id, version, date, category, status, pdf_path FROM papers WHERE base_id = ?",
+                (base_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ("base_id", "version", "date", "category", "status", "pdf_path")
+        return dict(zip(keys, row))
+
+    def record(
+        self,
+        arxiv_id: str,
+        date: str,
+        status: str,
+        version: Optional[str] = None,
+        category: Optional[str] = None,
+        pdf_path: Optional[str] = None,
+    ) -> None:
+        """Insert or update a paper. A summarized paper is never downgraded by a re-download."""
+        base_id, id_version = split_arxiv_id(arxiv_id)
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO papers (base_id, version, date, category, status, pdf_path, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(base_id) DO UPDATE SET"
+                "  version = COALESCE(excluded.version, papers.version),"
+                "  date = excluded.date,"
+                "  category = COALESCE(excluded.category, papers.category),"
+                "  status = CASE WHEN papers.status = 'summarized' AND excluded.status = 'downloaded'"
+                "                THEN papers.status ELSE excluded.status END,"
+                "  pdf_path = COALESCE(excluded.pdf_path, papers.pdf_path),"
+                "  updated_at = excluded.updated_at",
+                (base_id, version or id_version, date, category, status, pdf_path, time.time()),
+            )
+            self._db.commit()
+
+    def set_status(self, arxiv_id: str, status: str) -> None:
+        base_id, _ = split_arxiv_id(arxiv_id)
+        with self._lock:
+            self._db.execute(
+                "UPDATE papers SET status = ?, updated_at = ? WHERE base_id = ?",
+                (status, time.time(), base_id),
+            )
+            self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+__all__ = ["PaperIndex", "DEFAULT_INDEX_PATH", "split_arxiv_id"]
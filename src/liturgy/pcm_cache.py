@@ -0,0 +1,102 @@
+"""
+pcm_cache.py
+
+Local cache of decoded audio for build_track.
+
+Each entry is the raw int16 PCM of one source file at one target frame rate
+and channel count, stored as `<key>.s16le` where the key hashes the source
+bytes together with that format. Entries are opened with np.memmap, so
+stitching and mixing read straight from the page cache without a decode or
+an in-memory copy. Rebuilding an episode after swapping one paper therefore
+decodes only the new clip, and the background track is decoded once for
+all episodes.
+
+A hit refreshes the entry's mtime; once the total size goes over
+`max_bytes` the least recently used entries are removed.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Iterable
+
+import numpy as np
+
+from liturgy.summary_cache import evict_lru, file_sha256, stage_key
+
+DEFAULT_PCM_CACHE_DIR = Path("database") / "pcm_cache"
+SUFFIX = ".s16le"
+
+
+def open_pcm(path: str | Path, channels: int) -> np.ndarray:
+    """Read-only (frames, channels) int16 memmap of a raw s16le file."""
+    if os.path.getsize(path) == 0:
+        return np.zeros((0, channels), dtype=np.int16)
+    return np.memmap(path, dtype=np.int16, mode="r").reshape(-1, channels)
+
+
+class PcmCache:
+    def __init__(self, root: str | Path = DEFAULT_PCM_CACHE_DIR, max_bytes: int = 4 * 1024**3):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, path: str | Path, frame_rate: int, channels: int) -> str:
+        return stage_key(file_sha256(path), frame_rate=frame_rate, channels=channels, sample_width=2)
+
+    def get(
+        self,
+        path: str | Path,
+        frame_rate: int,
+        channels: int,
+        decode: Callable[[str | Path, int, int], Iterable[np.ndarray]],
+    ) -> np.ndarray:
+        """
+        Read-only (frames, channels) int16 memmap of `path` at the given format.
+        On a miss, `decode(path, frame_rate, channels)` is streamed to disk first.
+        """
+        entry = self.root / (self.key(path, frame_rate, channels) + SUFFIX)
+        with self._lock:
+            hit = entry.exists()
+            if hit:
+                self.hits += 1
+                os.utime(entry)
+            else:
+                self.misses += 1
+        if not hit:
+            tmp = entry.with_name(entry.name + f".{threading.get_ident()}.tmp")
+            try:
+                with open(tmp, "wb") as f:
+                    for block in decode(path, frame_rate, channels):
+                        f.write(np.ascontiguousarray(block, dtype=np.int16).data)
+            except BaseException:
+                tmp.unlink(missing_ok=True)
+                raise
+            os.replace(tmp, entry)
+            self._evict(keep=entry)
+
+        return open_pcm(entry, channels)
+
+    def _evict(self, keep: Path) -> None:
+        # An open memmap keeps its pages after the unlink.
+        with self._lock:
+            self.evictions += evict_lru(self.root, self.max_bytes, suffix=SUFFIX, keep=keep)
+
+    def report(self) -> str:
+        with self._lock:
+            lookups = self.hits + self.misses
+            rate = 100.0 * self.hits / lookups if lookups else 0.0
+            size = sum(p.stat().st_size for p in self.root.iterdir() if p.suffix == SUFFIX)
+            return (
+                f"PCM cache hits: {self.hits}/{lookups} ({rate:.0f}%); "
+                f"{self.evictions} evicted, {size / 1024 / 1024:.1f} MB on disk"
+            )
+
+
+__all__ = ["PcmCache", "open_pcm", "DEFAULT_PCM_CACHE_DIR"]
@@ -0,0 +1,121 @@
+"""
+pdf_text.py
+
+Optional local text extraction for the summarizer.
+
+Instead of uploading the whole PDF (figures and all) and having it parsed
+server-side, the body text is pulled out locally with pypdf. References,
+acknowledgements and appendices are cut off and the result is capped to a
+token budget, so the model only gets compact `input_text`.
+
+pypdf is optional: without it (or for a PDF with no extractable text) the
+functions return "" and callers fall back to uploading the PDF.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # optional dependency
+    PdfReader = None
+
+HAVE_PYPDF = PdfReader is not None
+
+DEFAULT_MAX_INPUT_TOKENS = 12_000
+CHARS_PER_TOKEN = 4  # rough average for English prose
+
+# A heading line that starts the back matter, e.g. "References", "6 References",
+# "Appendix A: Proofs", "Acknowledgments", "Supplementary Material".
+_BACK_MATTER_RE = re.compile(
+    r"^[ \t]*(?:(?:\d+|[A-Z]|[IVX]+)\.?[ \t]+)?"
+    r"(?:references|bibliography|acknowledge?ments?|appendix(?:[ \t]+[A-Z0-9](?:[.:][^\n]{0,60})?)?|appendices"
+    r"|supplementary[ \t]+(?:materials?|information))[ \t]*:?[ \t]*$",
+    re.IGNORECASE | re.MULTILINE,
+)
+_HYPHEN_BREAK_RE = re.compile(r"(\w)-\n(\w)")
+_SPACES_RE = re.compile(r"[ \t\xa0]+")
+_BLANK_LINES_RE = re.compile(r"\n\s*\n+")
+
+
+def strip_back_matter(text: str, min_fraction: float = 0.3) -> str:
+    """
+    Cut `text` at the first back-matter heading. Headings in the first
+    `min_fraction` of the text (e.g. a table of contents) are ignored.
+    """
+    start = int(len(text) * min_fraction)
+    m = _BACK_MATTER_RE.search(text, start)
+    return text[:m.start()] if m else text
+
+
+def cap_tokens(text: str, max_tokens: int) -> str:
+    """Trim `text` to about `max_tokens`, ending on a paragraph or sentence break if possible."""
+    limit = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    for sep in ("\n\n", ". "):
+        i = cut.rfind(sep)
+        if i > limit // 2:
+            return cut[:i + 1]
+    return cut
+
+
+def _clean(text: str) -> str:
+    text = _HYPHEN_BREAK_RE.sub(r"\1\2", text)
+    text = _SPACES_RE.sub(" ", text)
+    return _BLANK_LINES_RE.sub("\n\n", text).strip()
+
+
+def extract_text(pdf_path: str | Path, max_tokens: int = DEFAULT_MAX_INPUT_TOKENS) -> str:
+    """Body text of `pdf_path` without back matter, capped to `max_tokens`; "" if unavailable."""
+    if PdfReader is None:
+        return ""
+    try:
+        reader = PdfReader(str(pdf_path))
+        pages = [page.extract_text() or "" for page in reader.pages]
+    except Exception:
+        return ""
+    text = strip_back_matter(_clean("\n".join(pages)))
+    return cap_tokens(text, max_tokens)
+
+
+def extraction_pool(workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """
+    Process pool for extract_text. Workers are spawned, not forked: the
+    pipeline starts the pool while other threads are running, and a forked
+    child can inherit a lock some other thread was holding and deadlock.
+    """
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def extract_texts(
+    pdf_paths: Iterable[str | Path],
+    max_tokens: int = DEFAULT_MAX_INPUT_TOKENS,
+    workers: Optional[int] = None,
+) -> Dict[Path, str]:
+    """Extract many PDFs in a process pool (text extraction is CPU-bound). Returns {path: text}."""
+    paths = [Path(p) for p in pdf_paths]
+    if PdfReader is None or not paths:
+        return {p: "" for p in paths}
+    workers = workers or min(len(paths), os.cpu_count() or 1)
+    with extraction_pool(workers) as pool:
+        texts = pool.map(extract_text, paths, [max_tokens] * len(paths))
+        return dict(zip(paths, texts))
+
+
+__all__ = [
+    "extract_text",
+    "extract_texts",
+    "extraction_pool",
+    "strip_back_matter",
+    "cap_tokens",
+    "HAVE_PYPDF",
+    "DEFAULT_MAX_INPUT_TOKENS",
+]
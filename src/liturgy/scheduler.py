@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Optional, Tuple
+
+
+class RateBudget:
+    """
+    Sliding one-minute budget of requests (RPM) and tokens (TPM) shared by
+    every worker. `acquire(tokens)` blocks until one more request of that size
+    fits in both budgets; `pause(seconds)` stops everybody, e.g. after a 429.
+    A budget of None means unlimited.
+    """
+
+    WINDOW = 60.0
+
+    def __init__(self, rpm: Optional[int] = None, tpm: Optional[int] = None):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._events: Deque[Tuple[float, int]] = deque()
+        self._paused_until = 0.0
+        self._cond = threading.Condition()
+
+    def _wait_time(self, now: float, tokens: int) -> float:
+        while self._events and now - self._events[0][0] >= self.WINDOW:
+            self._events.popleft()
+        wait = max(0.0, self._paused_until - now)
+        if self.rpm is not None and len(self._events) >= self.rpm:
+            wait = max(wait, self._events[0][0] + self.WINDOW - now)
+        if self.tpm is not None and self._events:
+            used = sum(t for _, t in self._events)
+            # A single request larger than the whole budget is let through alone.
+            if used + tokens > self.tpm:
+                freed = 0
+                for ts, t in self._events:
+                    freed += t
+                    if used - freed + tokens <= self.tpm:
+                        wait = max(wait, ts + self.WINDOW - now)
+                        break
+                else:
+                    wait = max(wait, self._events[-1][0] + self.WINDOW - now)
+        return wait
+
+    def acquire(self, tokens: int = 0) -> None:
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                wait = self._wait_time(now, tokens)
+                if wait <= 0:
+                    self._events.append((now, tokens))
+                    return
+                self._cond.wait(wait)
+
+    def pause(self, seconds: float) -> None:
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._cond.notify_all()
+
+
+def _is_rate_limited(exc: BaseException) -> bool:
+    return getattr(exc, "status_code", None) == 429
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class SummaryScheduler:
+    """
+    Runs API-bound jobs (summaries, TTS) on up to `max_workers` threads.
+
+    Every job first takes its slot from a shared RateBudget. On a 429 the job
+    is retried after Retry-After (or a jittered exponential backoff), all
+    workers are paused for that long, and the number of jobs allowed in flight
+    is halved; it grows back by one after every `recover_after` successes.
+
+    `submit()` returns a Future, so callers keep their own ordering (e.g. sort
+    results by PDF path for the episode track list).
+
+    Jobs should use an API client without retries of its own (e.g.
+    `OpenAI(max_retries=0)`), so every 429 reaches the scheduler.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        rpm: Optional[int] = None,
+        tpm: Optional[int] = None,
+        max_retries: int = 6,
+        backoff: float = 2.0,
+        max_backoff: float = 120.0,
+        recover_after: int = 5,
+    ):
+        self.max_workers = max_workers
+        self.budget = RateBudget(rpm, tpm)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.recover_after = recover_after
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+        self._cond = threading.Condition()
+        self._limit = max_workers
+        self._active = 0
+        self._streak = 0
+        self.throttled = 0
+
+    def _enter(self) -> None:
+        with self._cond:
+            while self._active >= self._limit:
+                self._cond.wait()
+            self._active += 1
+
+    def _leave(self, outcome: str) -> None:
+        """Release a slot; `outcome` is "ok", "throttled" (a 429) or "failed" (any other error)."""
+        with self._cond:
+            self._active -= 1
+            if outcome == "ok":
+                self._streak += 1
+                if self._streak >= self.recover_after and self._limit < self.max_workers:
+                    self._limit += 1
+                    self._streak = 0
+            elif outcome == "throttled":
+                self.throttled += 1
+                self._streak = 0
+                self._limit = max(1, self._limit // 2)
+            self._cond.notify_all()
+
+    def _run(self, fn: Callable[..., Any], tokens: int, args, kwargs) -> Any:
+        attempt = 0
+        while True:
+            self._enter()
+            self.budget.acquire(tokens)
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                if not _is_rate_limited(e):
+                    self._leave("failed")
+                    raise
+                self._leave("throttled")
+                if attempt >= self.max_retries:
+                    raise
+                delay = _retry_after(e)
+                if delay is None:
+                    delay = random.uniform(0.5, 1.0) * min(self.max_backoff, self.backoff * (2 ** attempt))
+                self.budget.pause(delay)
+                time.sleep(delay)
+                attempt += 1
+                continue
+            self._leave("ok")
+            return result
+
+    def submit(self, fn: Callable[..., Any], *args, tokens: int = 0, **kwargs) -> Future:
+        """Schedule `fn(*args, **kwargs)`; `tokens` is its estimated TPM cost."""
+        return self._pool.submit(self._run, fn, tokens, args, kwargs)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+
+__all__ = ["RateBudget", "SummaryScheduler"]
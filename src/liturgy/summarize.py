@@ -1,69 +1,506 @@
 from __future__ import annotations
+import hashlib
+import io
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
-from openai import OpenAI
+from openai import OpenAI, BadRequestError, NotFoundError
+from pydub import AudioSegment
 
+from liturgy.summary_cache import SummaryCache, file_sha256, stage_key
+from liturgy.pdf_text import DEFAULT_MAX_INPUT_TOKENS, extract_text
+from liturgy.scheduler import SummaryScheduler
 
-def make_summary(
+TEXT_MODEL = "gpt-4.1"
+TTS_MODEL = "gpt-4o-mini-tts"
+VOICE = "alloy"
+AUDIO_FORMAT = "mp3"
+
+# Raw "pcm" output of the speech endpoint: 24 kHz, 16-bit signed little-endian, mono.
+PCM_RATE = 24_000
+PCM_WIDTH = 2
+TTS_CHUNK_CHARS = 800
+TTS_CHUNK_WORKERS = 4
+
+SUMMARY_PROMPT = (
+    "summarize this pdf for a person who knows the field in about 500 words. "
+    "don't give me any formatting or headers. just the text written as paragraphs, "
+    "no bullet points. write as though it were a short spoken presentation about the paper. "
+    "at the start state the title and the authors. no special characters."
+)
+
+
+def estimate_summary_tokens(pdf_path: str | Path, max_input_tokens: Optional[int] = None) -> int:
+    """
+    Rough tokens-per-minute cost of one summary request, used for rate budgeting
+    before the real usage is known: ~1 token per 40 bytes of PDF (text is a small
+    share of the file), capped, plus the prompt and a ~500-word answer.
+    `max_input_tokens` is the cap of a locally extracted text, if one is sent.
+    """
+    return min(max_input_tokens or 120_000, os.path.getsize(pdf_path) // 40) + 1_500
+
+
+# ------------------------- stage keys -------------------------
+
+def text_key(
     pdf_path: str | Path,
-    out_path: str | Path = "summary.wav",
     *,
-    text_model: str = "gpt-4.1",          # step 1: text summary
-    tts_model: str = "gpt-4o-mini-tts",   # step 2: text-to-speech
-    voice: str = "alloy",
-    audio_format: str = "mp3",            # one of: mp3, opus, aac, flac, wav, pcm
-) -> Tuple[Path, str]:
+    text_model: str = TEXT_MODEL,
+    pdf_sha: Optional[str] = None,
+    max_input_tokens: Optional[int] = None,
+) -> str:
     """
-    Two-step pipeline:
-      1) Summarize the uploaded PDF into plain text with the Responses API.
-      2) Convert that text into spoken audio and save it to `out_path`.
+    Key of the summary-text stage: PDF bytes + prompt + text model, plus the
+    token cap when the summary was made from locally extracted text
+    (`max_input_tokens`; None means the PDF itself was uploaded).
+    """
+    params = {"prompt": SUMMARY_PROMPT, "text_model": text_model}
+    if max_input_tokens is not None:
+        params["max_input_tokens"] = max_input_tokens
+    return stage_key(pdf_sha or file_sha256(pdf_path), **params)
 
-    Returns:
-      (out_path: Path, summary_text: str)
+
+def audio_key(
+    summary_text: str,
+    *,
+    tts_model: str = TTS_MODEL,
+    voice: str = VOICE,
+    audio_format: str = AUDIO_FORMAT,
+    chunk_chars: Optional[int] = None,
+) -> str:
+    """Key of the audio stage: summary text + TTS settings (+ chunk size if chunked)."""
+    text_sha = hashlib.sha256(summary_text.encode("utf-8")).hexdigest()
+    params = {"tts_model": tts_model, "voice": voice, "audio_format": audio_format}
+    if chunk_chars:
+        params["chunk_chars"] = chunk_chars
+    return stage_key(text_sha, **params)
+
+
+# ------------------------- text chunks -------------------------
+
+def split_summary(summary: str) -> List[str]:
+    """Split a summary into sentences."""
+    text = "".join(summary)
+    return [s for s in re.split(r"(?<=[.!?])\s+", text.strip()) if s]
+
+
+def chunk_summary(summary: str, max_chars: int = TTS_CHUNK_CHARS) -> List[str]:
+    """
+    Pack whole sentences into chunks of at most `max_chars` characters, so
+    every chunk ends at a sentence boundary. A sentence longer than
+    `max_chars` is split between words.
     """
-    client = OpenAI()
+    chunks: List[str] = []
+    current = ""
+    for sentence in split_summary(summary):
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current} {sentence}" if current else sentence
+    if current:
+        chunks.append(current)
+    return chunks
 
-    pdf_path = Path(pdf_path)
-    out_path = Path(out_path)
 
-    # --- Step 0: upload PDF so the model can read it ---
-    with pdf_path.open("rb") as f:
-        uploaded = client.files.create(file=f, purpose="user_data")
+# ------------------------- stages -------------------------
 
-    # --- Step 1: ask for a 700-word expert monologue summary (plain text only) ---
-    prompt = (
-        "summarize this pdf for a person who knows the field in about 500 words. "
-        "don't give me any formatting or headers. just the text written as paragraphs, "
-        "no bullet points. write as though it were a short spoken presentation about the paper. "
-        "at the start state the title and the authors. no special characters."
-    )
+def upload_pdf(pdf_path: str | Path, *, client: Optional[OpenAI] = None) -> str:
+    """Step 0: upload the PDF so the model can read it; returns the file id."""
+    client = client or OpenAI()
+    with Path(pdf_path).open("rb") as f:
+        return client.files.create(file=f, purpose="user_data").id
 
-    resp = client.responses.create(
-        model=text_model,
-        input=[{
+
+def _summary_request(text_model: str, file_id: Optional[str] = None, pdf_text: Optional[str] = None) -> dict:
+    """
+    Responses API body asking for a 500-word expert monologue summary (plain
+    text only) of an uploaded PDF (`file_id`) or of its extracted text (`pdf_text`).
+    """
+    if pdf_text is not None:
+        document = {"type": "input_text", "text": "Text of the pdf:\n\n" + pdf_text}
+    else:
+        document = {"type": "input_file", "file_id": file_id}
+    return {
+        "model": text_model,
+        "input": [{
             "role": "user",
             "content": [
-                {"type": "input_text", "text": prompt},
-                {"type": "input_file", "file_id": uploaded.id},
+                {"type": "input_text", "text": SUMMARY_PROMPT},
+                document,
             ],
         }],
-    )
+    }
+
 
+def _create_summary(client: OpenAI, request: dict) -> str:
+    resp = client.responses.create(**request)
     summary_text = resp.output_text  # convenience property from the SDK
     if not summary_text or not summary_text.strip():
         raise RuntimeError("No summary text returned from the model.")
+    return summary_text
+
+
+def summarize_file(file_id: str, *, text_model: str = TEXT_MODEL, client: Optional[OpenAI] = None) -> str:
+    """Step 1: summarize an uploaded PDF with the Responses API."""
+    return _create_summary(client or OpenAI(), _summary_request(text_model, file_id=file_id))
+
+
+def summarize_text(pdf_text: str, *, text_model: str = TEXT_MODEL, client: Optional[OpenAI] = None) -> str:
+    """Step 1 without an upload: summarize text extracted locally (see liturgy.pdf_text)."""
+    return _create_summary(client or OpenAI(), _summary_request(text_model, pdf_text=pdf_text))
+
+
+def _cached_file_id(pdf_path: str | Path, pdf_sha: str, client: OpenAI, cache: Optional[SummaryCache]) -> str:
+    file_id = cache.get_file_id(pdf_sha) if cache is not None else None
+    if file_id is None:
+        file_id = upload_pdf(pdf_path, client=client)
+        if cache is not None:
+            cache.put_file_id(pdf_sha, file_id)
+    return file_id
+
+
+def summarize_pdf(
+    pdf_path: str | Path,
+    *,
+    text_model: str = TEXT_MODEL,
+    client: Optional[OpenAI] = None,
+    cache: Optional[SummaryCache] = None,
+    pdf_text: Optional[str] = None,
+    max_input_tokens: int = DEFAULT_MAX_INPUT_TOKENS,
+) -> str:
+    """
+    Steps 0+1: upload the PDF and summarize it into plain text with the Responses API.
+
+    With a `cache`, a summary text for the same PDF bytes, prompt and model is
+    returned without any API call, and an earlier upload of the same bytes is
+    reused instead of uploading again.
+
+    If `pdf_text` (locally extracted with at most `max_input_tokens`, see
+    liturgy.pdf_text) is given, it is sent instead and nothing is uploaded.
+    """
+    client = client or OpenAI()
+    if pdf_text:
+        if cache is None:
+            return summarize_text(pdf_text, text_model=text_model, client=client)
+        key = text_key(pdf_path, text_model=text_model, max_input_tokens=max_input_tokens)
+        summary_text = cache.get_text(key)
+        if summary_text is None:
+            summary_text = summarize_text(pdf_text, text_model=text_model, client=client)
+            cache.put_text(key, summary_text)
+        return summary_text
+
+    if cache is None:
+        return summarize_file(upload_pdf(pdf_path, client=client), text_model=text_model, client=client)
+
+    pdf_sha = file_sha256(pdf_path)
+    key = text_key(pdf_path, text_model=text_model, pdf_sha=pdf_sha)
+    summary_text = cache.get_text(key)
+    if summary_text is not None:
+        return summary_text
+
+    file_id = cache.get_file_id(pdf_sha)
+    if file_id is not None:
+        try:
+            summary_text = summarize_file(file_id, text_model=text_model, client=client)
+        except (NotFoundError, BadRequestError):
+            # The uploaded file expired or was deleted; upload again below.
+            cache.drop_file_id(pdf_sha)
+            file_id = None
+    if file_id is None:
+        file_id = _cached_file_id(pdf_path, pdf_sha, client, cache)
+        summary_text = summarize_file(file_id, text_model=text_model, client=client)
+
+    cache.put_text(key, summary_text)
+    return summary_text
+
 
-    # --- Step 2: synthesize the summary as speech and save to disk ---
-    # Use streaming to write the audio efficiently.
+# ------------------------- batch mode -------------------------
+
+BATCH_DONE = ("completed", "failed", "expired", "cancelled")
+
+
+def _response_text(body: dict) -> str:
+    """Join the output_text parts of a raw Responses API body (what `output_text` does in the SDK)."""
+    parts = []
+    for item in body.get("output") or []:
+        if item.get("type") != "message":
+            continue
+        for c in item.get("content") or []:
+            if c.get("type") == "output_text":
+                parts.append(c.get("text", ""))
+    return "".join(parts)
+
+
+def summarize_batch(
+    pdf_paths: List[str | Path],
+    state_path: str | Path,
+    *,
+    text_model: str = TEXT_MODEL,
+    client: Optional[OpenAI] = None,
+    cache: Optional[SummaryCache] = None,
+    poll_interval: float = 30.0,
+    max_poll_interval: float = 600.0,
+    timeout: float = 24 * 3600,
+    pdf_texts: Optional[Dict[Path, str]] = None,
+    max_input_tokens: int = DEFAULT_MAX_INPUT_TOKENS,
+) -> Dict[Path, str]:
+    """
+    Summarize a whole day's PDFs as one Batch API job (cheaper, higher
+    throughput, not interactive).
+
+    The job id and the request -> PDF mapping are saved to `state_path`, so a
+    rerun after a crash keeps polling the same job instead of submitting a new
+    one. Polling backs off from `poll_interval` to `max_poll_interval`.
+
+    PDFs with a non-empty entry in `pdf_texts` (see liturgy.pdf_text) are sent
+    as extracted text instead of an uploaded file.
+
+    Returns {pdf_path: summary_text} for the PDFs the batch (or the cache)
+    answered; callers fall back to `summarize_pdf` for the rest.
+    """
+    client = client or OpenAI()
+    state_path = Path(state_path)
+    texts: Dict[Path, str] = {}
+
+    state = None
+    if state_path.exists():
+        try:
+            state = json.loads(state_path.read_text())
+        except ValueError:
+            state = None
+
+    if state is None:
+        requests_by_id: Dict[str, str] = {}
+        lines = []
+        pdf_texts = pdf_texts or {}
+        for p in map(Path, pdf_paths):
+            pdf_sha = file_sha256(p)
+            pdf_text = pdf_texts.get(p)
+            key = text_key(p, text_model=text_model, pdf_sha=pdf_sha,
+                           max_input_tokens=max_input_tokens if pdf_text else None)
+            cached = cache.get_text(key) if cache is not None else None
+            if cached is not None:
+                texts[p] = cached
+                continue
+            if key in requests_by_id:
+                continue  # same PDF bytes twice
+            if pdf_text:
+                body = _summary_request(text_model, pdf_text=pdf_text)
+            else:
+                body = _summary_request(text_model, file_id=_cached_file_id(p, pdf_sha, client, cache))
+            requests_by_id[key] = str(p)
+            lines.append(json.dumps({
+                "custom_id": key,
+                "method": "POST",
+                "url": "/v1/responses",
+                "body": body,
+            }))
+        if not lines:
+            return texts
+
+        batch_input = client.files.create(
+            file=("summaries.jsonl", io.BytesIO("\n".join(lines).encode("utf-8"))),
+            purpose="batch",
+        )
+        batch = client.batches.create(
+            input_file_id=batch_input.id,
+            endpoint="/v1/responses",
+            completion_window="24h",
+        )
+        state = {"batch_id": batch.id, "requests": requests_by_id, "created_at": time.time()}
+        tmp = state_path.with_name(state_path.name + ".tmp")
+        tmp.write_text(json.dumps(state))
+        os.replace(tmp, state_path)
+        print(f"Submitted batch {batch.id} with {len(lines)} summaries")
+    else:
+        print(f"Resuming batch {state['batch_id']}")
+
+    delay = poll_interval
+    while True:
+        batch = client.batches.retrieve(state["batch_id"])
+        if batch.status in BATCH_DONE:
+            break
+        if time.time() - state["created_at"] > timeout:
+            print(f"Batch {batch.id} still {batch.status}; giving up for now", flush=True)
+            return texts
+        time.sleep(delay)
+        delay = min(max_poll_interval, delay * 1.5)
+
+    print(f"Batch {batch.id} {batch.status}")
+    if batch.output_file_id:
+        for line in client.files.content(batch.output_file_id).text.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            pdf = state["requests"].get(record.get("custom_id"))
+            response = record.get("response") or {}
+            if pdf is None or response.get("status_code") != 200:
+                continue
+            summary_text = _response_text(response.get("body") or {})
+            if not summary_text.strip():
+                continue
+            texts[Path(pdf)] = summary_text
+            if cache is not None:
+                cache.put_text(record["custom_id"], summary_text)
+
+    state_path.unlink(missing_ok=True)
+    return texts
+
+
+def _speech_pcm(text: str, *, tts_model: str, voice: str, client: OpenAI) -> bytes:
     with client.audio.speech.with_streaming_response.create(
         model=tts_model,
         voice=voice,
-        input=summary_text,
-        response_format=audio_format,  # e.g., "wav" or "mp3"
+        input=text,
+        response_format="pcm",
     ) as speech:
-        speech.stream_to_file(out_path)
+        return speech.read()
+
+
+def _synthesize_chunked(
+    summary_text: str,
+    out_path: Path,
+    *,
+    tts_model: str,
+    voice: str,
+    audio_format: str,
+    chunk_chars: int,
+    chunk_workers: int,
+    client: OpenAI,
+    scheduler: Optional[SummaryScheduler] = None,
+) -> None:
+    """
+    Synthesize sentence-aligned chunks concurrently as raw PCM, join them in
+    order and encode once, so there are no encoder gaps at chunk boundaries.
+
+    With a `scheduler` every chunk is its own scheduled request: it counts
+    against the scheduler's budget and concurrency, and a 429 retries only
+    that chunk.
+    """
+    chunks = chunk_summary(summary_text, chunk_chars)
+    if scheduler is not None:
+        futures = [scheduler.submit(_speech_pcm, chunk, tts_model=tts_model, voice=voice, client=client)
+                   for chunk in chunks]
+        parts = [f.result() for f in futures]
+    else:
+        with ThreadPoolExecutor(max_workers=max(1, min(chunk_workers, len(chunks)))) as pool:
+            parts = list(pool.map(
+                lambda chunk: _speech_pcm(chunk, tts_model=tts_model, voice=voice, client=client), chunks
+            ))
+    pcm = b"".join(parts)
+    if audio_format == "pcm":
+        out_path.write_bytes(pcm)
+        return
+    audio = AudioSegment(data=pcm, sample_width=PCM_WIDTH, frame_rate=PCM_RATE, channels=1)
+    audio.export(out_path, format=audio_format)
+
 
+def synthesize_speech(
+    summary_text: str,
+    out_path: str | Path,
+    *,
+    tts_model: str = TTS_MODEL,
+    voice: str = VOICE,
+    audio_format: str = AUDIO_FORMAT,
+    client: Optional[OpenAI] = None,
+    cache: Optional[SummaryCache] = None,
+    chunk_chars: Optional[int] = None,
+    chunk_workers: int = TTS_CHUNK_WORKERS,
+    scheduler: Optional[SummaryScheduler] = None,
+) -> Path:
+    """
+    Step 2: synthesize `summary_text` as speech and save it to `out_path`.
+    With a `cache`, audio for the same text and TTS settings is copied instead.
+
+    With `chunk_chars`, the text is split at sentence boundaries into chunks of
+    at most that many characters, which are synthesized `chunk_workers` at a
+    time (or as jobs of `scheduler`, if given) and joined in order into one file.
+    Don't call this from a job of that same scheduler: it would hold a slot
+    while waiting for its chunks.
+    """
+    out_path = Path(out_path)
+    key = None
+    if cache is not None:
+        key = audio_key(summary_text, tts_model=tts_model, voice=voice, audio_format=audio_format,
+                        chunk_chars=chunk_chars)
+        if cache.get_audio(key, out_path, audio_format):
+            return out_path
+
+    client = client or OpenAI()
+    if chunk_chars:
+        _synthesize_chunked(
+            summary_text, out_path,
+            tts_model=tts_model, voice=voice, audio_format=audio_format,
+            chunk_chars=chunk_chars, chunk_workers=chunk_workers, client=client, scheduler=scheduler,
+        )
+    else:
+        # Use streaming to write the audio efficiently.
+        with client.audio.speech.with_streaming_response.create(
+            model=tts_model,
+            voice=voice,
+            input=summary_text,
+            response_format=audio_format,  # e.g., "wav" or "mp3"
+        ) as speech:
+            speech.stream_to_file(out_path)
+
+    if cache is not None:
+        cache.put_audio(key, out_path, audio_format)
+    return out_path
+
+
+def make_summary(
+    pdf_path: str | Path,
+    out_path: str | Path = "summary.wav",
+    *,
+    text_model: str = TEXT_MODEL,         # step 1: text summary
+    tts_model: str = TTS_MODEL,           # step 2: text-to-speech
+    voice: str = VOICE,
+    audio_format: str = AUDIO_FORMAT,     # one of: mp3, opus, aac, flac, wav, pcm
+    client: Optional[OpenAI] = None,
+    cache: Optional[SummaryCache] = None,
+    local_text: bool = False,
+    max_input_tokens: int = DEFAULT_MAX_INPUT_TOKENS,
+    chunk_chars: Optional[int] = None,
+) -> Tuple[Path, str]:
+    """
+    Two-step pipeline:
+      1) Summarize the uploaded PDF into plain text with the Responses API.
+      2) Convert that text into spoken audio and save it to `out_path`.
+
+    With a `cache`, each stage (upload, text, audio) is looked up on its own
+    before it runs, so e.g. a new voice only reruns the TTS step.
+
+    With `local_text=True` the PDF text is extracted locally (needs pypdf) and
+    sent instead of the PDF; it falls back to the upload when nothing is extracted.
+    With `chunk_chars` the speech is synthesized in parallel sentence chunks.
+
+    Returns:
+      (out_path: Path, summary_text: str)
+    """
+    client = client or OpenAI()
+    pdf_text = extract_text(pdf_path, max_input_tokens) if local_text else None
+    summary_text = summarize_pdf(
+        pdf_path, text_model=text_model, client=client, cache=cache,
+        pdf_text=pdf_text, max_input_tokens=max_input_tokens,
+    )
+    out_path = synthesize_speech(
+        summary_text, out_path,
+        tts_model=tts_model, voice=voice, audio_format=audio_format, client=client, cache=cache,
+        chunk_chars=chunk_chars,
+    )
     return out_path, summary_text
 
 
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DEFAULT_SUMMARY_CACHE_DIR = Path("database") / "summary_cache"
+
+STAGES = ("upload", "text", "audio")
+
+
+def file_sha256(path: str | Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def stage_key(*parts: str, **params) -> str:
+    """
+    Content address of one pipeline stage: hash of its inputs (e.g. the PDF or
+    summary-text hash) plus every parameter that changes its output. The same
+    paper under another date or folder name maps to the same keys.
+    """
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode())
+        h.update(b"\0")
+    h.update(json.dumps(params, sort_keys=True).encode())
+    return h.hexdigest()
+
+
+def evict_lru(root: Path, max_bytes: int, suffix: Optional[str] = None, keep: Optional[Path] = None) -> int:
+    """
+    Delete the least recently used (oldest mtime) files in `root` until the
+    ones ending in `suffix` (any, if None) total at most `max_bytes`.
+    In-progress `.tmp` files and `keep` are never removed. Returns the
+    number of files deleted; callers hold their own lock.
+    """
+    files = [p for p in root.iterdir()
+             if p.is_file() and not p.name.endswith(".tmp") and (suffix is None or p.suffix == suffix)]
+    stats = {p: p.stat() for p in files}
+    total = sum(st.st_size for st in stats.values())
+    removed = 0
+    for p, st in sorted(stats.items(), key=lambda kv: kv[1].st_mtime):
+        if total <= max_bytes:
+            break
+        if p == keep:
+            continue
+        p.unlink(missing_ok=True)
+        total -= st.st_size
+        removed += 1
+    return removed
+
+
+class SummaryCache:
+    """
+    Global, content-addressed store of summary artifacts shared across dates,
+    one artifact per pipeline stage:
+
+      - upload: `<pdf sha>.fileid`   OpenAI file id of the uploaded PDF
+      - text:   `<key>.txt`          summary text (PDF hash + prompt + text_model)
+      - audio:  `<key>.<format>`     speech (text hash + tts_model + voice + format)
+
+    A stage is only rerun when its own key is missing, so changing the voice
+    reuses the text and changing the prompt reuses the upload. A hit refreshes
+    the artifact's mtime; once the total size goes over `max_bytes` the least
+    recently used artifacts are evicted. `report()` gives per-stage hit rates.
+    """
+
+    def __init__(self, root: str | Path = DEFAULT_SUMMARY_CACHE_DIR, max_bytes: int = 2 * 1024**3):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.counters: Dict[str, List[int]] = {stage: [0, 0] for stage in STAGES}  # [hits, misses]
+        self.evictions = 0
+
+    def _lookup(self, stage: str, path: Path) -> bool:
+        with self._lock:
+            if not path.exists():
+                self.counters[stage][1] += 1
+                return False
+            self.counters[stage][0] += 1
+            os.utime(path)
+            return True
+
+    def _write(self, path: Path, data: bytes) -> None:
+        tmp = path.with_name(path.name + f".{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        self._evict()
+
+    # ------------------------- stages -------------------------
+
+    def get_file_id(self, pdf_sha: str) -> Optional[str]:
+        path = self.root / f"{pdf_sha}.fileid"
+        if not self._lookup("upload", path):
+            return None
+        return json.loads(path.read_text(encoding="utf-8"))["file_id"]
+
+    def put_file_id(self, pdf_sha: str, file_id: str) -> None:
+        record = {"file_id": file_id, "uploaded_at": time.time()}
+        self._write(self.root / f"{pdf_sha}.fileid", json.dumps(record).encode())
+
+    def drop_file_id(self, pdf_sha: str) -> None:
+        """Forget an upload the API no longer knows about."""
+        (self.root / f"{pdf_sha}.fileid").unlink(missing_ok=True)
+
+    def get_text(self, key: str) -> Optional[str]:
+        path = self.root / f"{key}.txt"
+        if not self._lookup("text", path):
+            return None
+        return path.read_text(encoding="utf-8")
+
+    def put_text(self, key: str, summary_text: str) -> None:
+        self._write(self.root / f"{key}.txt", summary_text.encode("utf-8"))
+
+    def get_audio(self, key: str, out_path: str | Path, audio_format: str) -> bool:
+        """On a hit, copy the cached audio to `out_path`."""
+        path = self.root / f"{key}.{audio_format}"
+        if not self._lookup("audio", path):
+            return False
+        shutil.copyfile(path, out_path)
+        return True
+
+    def put_audio(self, key: str, audio_path: str | Path, audio_format: str) -> None:
+        path = self.root / f"{key}.{audio_format}"
+        tmp = path.with_name(path.name + f".{threading.get_ident()}.tmp")
+        shutil.copyfile(audio_path, tmp)
+        os.replace(tmp, path)
+        self._evict()
+
+    # ------------------------- housekeeping -------------------------
+
+    def _evict(self) -> None:
+        with self._lock:
+            self.evictions += evict_lru(self.root, self.max_bytes)
+
+    def report(self) -> str:
+        with self._lock:
+            parts = []
+            for stage, (hits, misses) in self.counters.items():
+                lookups = hits + misses
+                rate = 100.0 * hits / lookups if lookups else 0.0
+                parts.append(f"{stage} {hits}/{lookups} ({rate:.0f}%)")
+            size = sum(p.stat().st_size for p in self.root.iterdir() if p.is_file())
+            return (
+                "Summary cache hits: " + ", ".join(parts)
+                + f"; {self.evictions} evicted, {size / 1024 / 1024:.1f} MB on disk"
+            )
+
+
+__all__ = ["SummaryCache", "stage_key", "file_sha256", "evict_lru", "DEFAULT_SUMMARY_CACHE_DIR"]
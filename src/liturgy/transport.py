@@ -0,0 +1,255 @@
+"""
+transport.py
+
+Shared HTTP transport for the scrapers (arxiv.py, get_liturgy.py).
+
+One `requests.Session` with a sized keep-alive connection pool, a per-host
+rate limiter, and retries with jittered exponential backoff on connection
+errors, timeouts and 429/5xx responses. `Retry-After` (seconds or HTTP date)
+is honored when the server sends it. `download()` streams a body to a file
+and resumes it with Range requests when the transfer breaks off. Every
+request (for downloads: headers, body and all resumes) is timed; `stats()`
+gives a summary for the run.
+"""
+
+import os
+import random
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+UA_DEFAULT = "arXiv titles downloader (requests; contact: youremail@example.com)"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Errors that can break off a streamed body; the transfer is resumed after them.
+BROKEN_TRANSFER = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+
+
+class IncompleteDownload(IOError):
+    """A download ended before the size announced by the server."""
+
+
+class HostRateLimiter:
+    """
+    Thread-safe limiter that spaces requests to the same host by at least
+    `min_interval` seconds. Workers reserve the next free slot under a lock
+    and sleep outside it, so one slow host never blocks requests to another.
+    """
+
+    def __init__(self, min_interval: float = 0.0):
+        self.min_interval = max(0.0, float(min_interval))
+        self._lock = threading.Lock()
+        self._next_slot: Dict[str, float] = {}
+
+    def wait(self, url: str) -> None:
+        if self.min_interval <= 0:
+            return
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, 0.0))
+            self._next_slot[host] = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def defer(self, url: str, seconds: float) -> None:
+        """Push the host's next slot back, e.g. after a Retry-After from that host."""
+        host = urlsplit(url).netloc
+        with self._lock:
+            self._next_slot[host] = max(self._next_slot.get(host, 0.0), time.monotonic() + seconds)
+
+
+def expected_size(r: requests.Response, offset: int) -> int:
+    """Full file size announced by the server (0 if unknown)."""
+    if r.status_code == 206:
+        m = re.search(r"/(\d+)\s*$", r.headers.get("Content-Range", ""))
+        return int(m.group(1)) if m else 0
+    if r.headers.get("Content-Encoding", "identity") != "identity":
+        return 0  # Content-Length counts compressed bytes
+    return int(r.headers.get("Content-Length") or 0)
+
+
+def _retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class Transport:
+    def __init__(
+        self,
+        user_agent: Optional[str] = None,
+        pool_size: int = 10,
+        retries: int = 4,
+        backoff: float = 0.5,
+        max_backoff: float = 60.0,
+        min_interval: float = 0.0,
+        timeout: float = 60.0,
+    ):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.limiter = HostRateLimiter(min_interval)
+
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": user_agent or UA_DEFAULT})
+        # Retries are handled below so Retry-After and timings stay in one place.
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._lock = threading.Lock()
+        self.timings: List[Dict[str, Any]] = []
+
+    def _delay(self, attempt: int, retry_after: Optional[float]) -> float:
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        # "Full jitter" exponential backoff.
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    def _record(self, url: str, status: Optional[int], started: float, attempts: int) -> None:
+        with self._lock:
+            self.timings.append({
+                "url": url,
+                "status": status,
+                "seconds": time.monotonic() - started,
+                "attempts": attempts,
+            })
+
+    def _send(self, url: str, **kwargs):
+        """GET with retries; returns (response, attempts) without recording a timing."""
+        kwargs.setdefault("timeout", self.timeout)
+        attempt = 0
+        while True:
+            self.limiter.wait(url)
+            try:
+                r = self.session.get(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.retries:
+                    e.attempts = attempt + 1
+                    raise
+                time.sleep(self._delay(attempt, None))
+                attempt += 1
+                continue
+
+            if r.status_code not in RETRY_STATUSES or attempt >= self.retries:
+                return r, attempt + 1
+
+            retry_after = _retry_after_seconds(r.headers.get("Retry-After"))
+            delay = self._delay(attempt, retry_after)
+            if retry_after is not None:
+                self.limiter.defer(url, delay)
+            r.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """
+        GET with retries. Returns the last response (callers still call
+        `raise_for_status()`); raises the last exception if every attempt failed
+        at the connection level.
+        """
+        started = time.monotonic()
+        try:
+            r, attempts = self._send(url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            self._record(url, None, started, getattr(e, "attempts", 1))
+            raise
+        self._record(url, r.status_code, started, attempts)
+        return r
+
+    def download(
+        self,
+        url: str,
+        path: str,
+        resume_attempts: int = 5,
+        chunk_size: int = 131072,
+        on_response: Optional[Callable[[requests.Response, int, int], None]] = None,
+    ) -> int:
+        """
+        Stream `url` into `path`, appending to what the file already holds with
+        a `Range: bytes=<size>-` request. When the body breaks off (connection
+        reset, read timeout, chunked-encoding error, fewer bytes than
+        announced) the transfer resumes the same way, up to `resume_attempts`
+        transfers with backoff. `on_response(r, offset, total)` is called as
+        each transfer starts.
+
+        A 416 (nothing past the current size) counts as finished. The whole
+        download is recorded as one timing, with every request as an attempt.
+        Returns the size of `path`; raises HTTPError for an error status and
+        the last transfer error once the attempts are used up.
+        """
+        started = time.monotonic()
+        attempts = 0
+        status: Optional[int] = None
+        transfer = 0
+        try:
+            while True:
+                offset = os.path.getsize(path) if os.path.exists(path) else 0
+                headers = {"Range": f"bytes={offset}-"} if offset else {}
+                try:
+                    r, sent = self._send(url, headers=headers, stream=True)
+                    attempts += sent
+                    with r:
+                        status = r.status_code
+                        if status == 416:
+                            return offset
+                        r.raise_for_status()
+                        if offset and status != 206:
+                            offset = 0  # server ignored the Range header
+                        total = expected_size(r, offset)
+                        if on_response is not None:
+                            on_response(r, offset, total)
+                        with open(path, "ab" if offset else "wb") as f:
+                            for chunk in r.iter_content(chunk_size=chunk_size):
+                                if chunk:
+                                    f.write(chunk)
+                            f.flush()
+                            os.fsync(f.fileno())
+                    got = os.path.getsize(path)
+                    if total and got != total:
+                        raise IncompleteDownload(f"{url}: got {got} of {total} bytes")
+                    return got
+                except BROKEN_TRANSFER + (IncompleteDownload,) as e:
+                    attempts += getattr(e, "attempts", 0)
+                    status = None
+                    transfer += 1
+                    if transfer >= resume_attempts:
+                        raise
+                    time.sleep(self._delay(transfer, None))
+        finally:
+            self._record(url, status, started, max(attempts, 1))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            timings = list(self.timings)
+        seconds = [t["seconds"] for t in timings]
+        return {
+            "requests": len(timings),
+            "retried": sum(1 for t in timings if t["attempts"] > 1),
+            "failed": sum(1 for t in timings if t["status"] is None or t["status"] >= 400),
+            "total_seconds": round(sum(seconds), 3),
+            "max_seconds": round(max(seconds), 3) if seconds else 0.0,
+        }
+
+    def close(self) -> None:
+        self.session.close()
+
+
+__all__ = ["Transport", "HostRateLimiter", "IncompleteDownload", "expected_size", "UA_DEFAULT"]